@@ -2,15 +2,193 @@
 
 import os
 import json
+import functools
 import logging
 import zipfile
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
 import shutil
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
 logger = logging.getLogger(__name__)
 
+# Keyword fragments used to classify hashtags in rank_hashtags
+_BRAND_KW = ('game', 'oyun', 'mobile', 'mobil')
+_NICHE_KW = ('rpg', 'mmo', 'pvp', 'fps', 'strategy')
+
+# Already-compressed image formats, stored in the package without deflate
+_IMG_EXT = ('.jpg', '.jpeg', '.png')
+_ZIP_COPY_BUFSIZE = 1 << 20
+
+
+def _build_category_automaton():
+    """Build an Aho-Corasick automaton mapping keyword fragments to categories."""
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for word in _BRAND_KW:
+        automaton.add_word(word, 'brand')
+    for word in _NICHE_KW:
+        automaton.add_word(word, 'niche')
+    automaton.make_automaton()
+    return automaton
+
+
+_CAT_AC = _build_category_automaton()
+
+
+def _classify_tag(tag_lower: str) -> Optional[str]:
+    """
+    Classify a lowercased hashtag as 'brand', 'niche' or None.
+    
+    Brand keywords take precedence over niche keywords. Uses a single
+    automaton pass when pyahocorasick is installed.
+    """
+    if _CAT_AC is not None:
+        categories = {category for _, category in _CAT_AC.iter(tag_lower)}
+        if 'brand' in categories:
+            return 'brand'
+        if 'niche' in categories:
+            return 'niche'
+        return None
+    
+    if any(word in tag_lower for word in _BRAND_KW):
+        return 'brand'
+    if any(word in tag_lower for word in _NICHE_KW):
+        return 'niche'
+    return None
+
+
+@functools.lru_cache(maxsize=64)
+def _rank_hashtags(hashtags: Tuple[str, ...], trending_tags: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Rank hashtags against trending tags; memoized per argument pair."""
+    trending_lower = {t.lower() for t in trending_tags}
+    
+    # Categorize hashtags
+    trend_hashtags = []
+    niche_hashtags = []
+    brand_hashtags = []
+    general_hashtags = []
+    
+    for tag in hashtags:
+        tag_lower = tag.lower()
+        
+        # Check if trending
+        if tag_lower in trending_lower:
+            trend_hashtags.append(tag)
+            continue
+        
+        # Check for brand/game specific, then niche gaming
+        category = _classify_tag(tag_lower)
+        if category == 'brand':
+            brand_hashtags.append(tag)
+        elif category == 'niche':
+            niche_hashtags.append(tag)
+        else:
+            general_hashtags.append(tag)
+    
+    # Build ordered list: 3 trend + 2 niche + 2 brand + rest
+    ordered = []
+    seen = set()
+    
+    def _extend(source: List[str], limit: Optional[int] = None):
+        """Append up to ``limit`` tags from source that are not yet ordered."""
+        added = 0
+        for tag in source:
+            if added == limit:
+                break
+            if tag not in seen:
+                ordered.append(tag)
+                seen.add(tag)
+                added += 1
+    
+    # Add trending first
+    _extend(trend_hashtags, 3)
+    
+    # Add niche
+    _extend(niche_hashtags, 2)
+    
+    # Add brand/game
+    _extend(brand_hashtags, 2)
+    
+    # Fill with general up to the 12-tag cap
+    _extend(general_hashtags, 12 - len(ordered))
+    
+    # Top up with tags the category caps held back
+    if len(ordered) < 12:
+        _extend(hashtags, 12 - len(ordered))
+    
+    return tuple(ordered)
+
+
+def _iter_image_entries(images_dir: Optional[str]) -> Iterator[os.DirEntry]:
+    """
+    Yield image files directly inside images_dir in a single scandir pass.
+    
+    Yields nothing when the directory is unset or does not exist, so callers
+    need no separate existence check.
+    """
+    if not images_dir:
+        return
+    try:
+        with os.scandir(images_dir) as entries:
+            for entry in entries:
+                if entry.name.lower().endswith(_IMG_EXT) and entry.is_file():
+                    yield entry
+    except FileNotFoundError:
+        return
+
+
+def _encode_json(value, depth: int) -> bytes:
+    """Encode a value as indented UTF-8 JSON nested ``depth`` levels deep."""
+    encoded = None
+    if orjson is not None:
+        try:
+            encoded = orjson.dumps(value, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # orjson rejects float subclasses such as numpy scalars
+            pass
+    if encoded is None:
+        encoded = json.dumps(value, ensure_ascii=False, indent=2).encode('utf-8')
+    return encoded.replace(b'\n', b'\n' + b'  ' * depth)
+
+
+def _dump_json_sections(fp: BinaryIO, sections: Tuple[Tuple[str, object], ...]):
+    """
+    Write top-level sections to ``fp`` as one JSON object.
+    
+    Iterator values are written as arrays one item at a time, so they never
+    have to be materialized. Output matches ``json.dump(..., indent=2)``.
+    
+    Args:
+        fp: Open binary file to write to
+        sections: Ordered (key, value) pairs
+    """
+    fp.write(b'{')
+    for index, (key, value) in enumerate(sections):
+        fp.write(b',\n  ' if index else b'\n  ')
+        fp.write(json.dumps(key, ensure_ascii=False).encode('utf-8') + b': ')
+        if isinstance(value, Iterator):
+            empty = True
+            for item in value:
+                fp.write(b'[\n    ' if empty else b',\n    ')
+                fp.write(_encode_json(item, 2))
+                empty = False
+            fp.write(b'[]' if empty else b'\n  ]')
+        else:
+            fp.write(_encode_json(value, 1))
+    fp.write(b'\n}')
+
 
 class FinalizationAgent:
     """Agent for finalizing and packaging content."""
@@ -31,55 +209,32 @@ class FinalizationAgent:
             Ordered list of hashtags
         """
         # Get trending hashtags from trend data
-        trending_tags = set()
-        if trend_data and 'hashtags' in trend_data:
-            trending_tags = set(trend_data['hashtags'][:10])
-        
-        # Categorize hashtags
-        trend_hashtags = []
-        niche_hashtags = []
-        brand_hashtags = []
-        general_hashtags = []
+        trending_tags = ()
+        if trend_data and trend_data.get('hashtags'):
+            trending_tags = tuple(trend_data['hashtags'][:10])
         
-        for tag in hashtags:
-            tag_lower = tag.lower()
+        return list(_rank_hashtags(tuple(hashtags), trending_tags))
+    
+    def _iter_post_options(self, validated_candidates: List[Dict], trend_results: Dict) -> Iterator[Dict]:
+        """Yield post options with ranked hashtags, one candidate at a time."""
+        for i, candidate in enumerate(validated_candidates):
+            validated = candidate.get('validated', {})
             
-            # Check if trending
-            if tag in trending_tags or any(t.lower() == tag_lower for t in trending_tags):
-                trend_hashtags.append(tag)
-            # Check for brand/game specific
-            elif any(word in tag_lower for word in ['game', 'oyun', 'mobile', 'mobil']):
-                brand_hashtags.append(tag)
-            # Check for niche gaming
-            elif any(word in tag_lower for word in ['rpg', 'mmo', 'pvp', 'fps', 'strategy']):
-                niche_hashtags.append(tag)
-            else:
-                general_hashtags.append(tag)
-        
-        # Build ordered list: 3 trend + 2 niche + 2 brand + rest
-        ordered = []
-        
-        # Add trending first
-        ordered.extend(trend_hashtags[:3])
-        
-        # Add niche
-        remaining_niche = [h for h in niche_hashtags if h not in ordered]
-        ordered.extend(remaining_niche[:2])
-        
-        # Add brand/game
-        remaining_brand = [h for h in brand_hashtags if h not in ordered]
-        ordered.extend(remaining_brand[:2])
-        
-        # Fill with general
-        remaining_general = [h for h in general_hashtags if h not in ordered]
-        ordered.extend(remaining_general)
-        
-        # Add any remaining hashtags
-        for tag in hashtags:
-            if tag not in ordered:
-                ordered.append(tag)
-        
-        return ordered[:12]  # Ensure max 12 hashtags
+            # Rank hashtags
+            ranked_hashtags = self.rank_hashtags(
+                validated.get('hashtags', []),
+                trend_results
+            )
+            
+            yield {
+                'option_number': i + 1,
+                'title': validated.get('title', ''),
+                'caption': validated.get('caption', ''),
+                'hashtags': ranked_hashtags,
+                'hashtags_text': ' '.join(ranked_hashtags),
+                'metrics': candidate.get('metrics', {}),
+                'quality_notes': candidate.get('validation_issues', [])
+            }
     
     def create_final_json(self, 
                          trend_results: Dict,
@@ -104,75 +259,58 @@ class FinalizationAgent:
             # Extract validated candidates
             validated_candidates = quality_results.get('validated_candidates', [])
             
-            # Create post options with ranked hashtags
-            post_options = []
-            for i, candidate in enumerate(validated_candidates):
-                validated = candidate.get('validated', {})
-                
-                # Rank hashtags
-                ranked_hashtags = self.rank_hashtags(
-                    validated.get('hashtags', []),
-                    trend_results
-                )
-                
-                post_options.append({
-                    'option_number': i + 1,
-                    'title': validated.get('title', ''),
-                    'caption': validated.get('caption', ''),
-                    'hashtags': ranked_hashtags,
-                    'metrics': candidate.get('metrics', {}),
-                    'quality_notes': candidate.get('validation_issues', [])
-                })
-            
-            # Create trend info summary
-            trend_info = {
-                'keywords_analyzed': trend_results.get('keywords_analyzed', 0),
-                'top_trending': [
-                    {
-                        'keyword': kw['keyword'],
-                        'score': round(kw['score'], 2)
-                    }
-                    for kw in trend_results.get('top_keywords', [])[:10]
-                ],
-                'recommended_hashtags': trend_results.get('hashtags', [])[:15]
-            }
-            
-            # Create understanding brief
-            understanding_brief = {
-                'content_analyzed': {
-                    'screenshots': understanding_results.get('screenshots', {}).get('count', 0),
-                    'video_duration': understanding_results.get('video', {}).get('duration', 0),
-                    'text_words': understanding_results.get('text', {}).get('word_count', 0)
-                },
-                'key_insights': {
-                    'video_transcript_preview': understanding_results.get('video', {}).get('transcript', '')[:500],
-                    'image_captions_sample': [
-                        cap.get('caption', '') 
-                        for cap in understanding_results.get('screenshots', {}).get('captions', [])[:3]
-                    ],
-                    'game_summary': understanding_results.get('text', {}).get('summary', '')[:300]
-                }
-            }
-            
             # Get processed images info
-            images_info = quality_results.get('processed_images', {})
+            images_info = quality_results.get('processed_images') or {}
+            image_files = [os.path.basename(p) for p in images_info.get('paths', ())]
+            
+            # Resolve the nested understanding sections once
+            video = understanding_results.get('video') or {}
+            screenshots = understanding_results.get('screenshots') or {}
+            text = understanding_results.get('text') or {}
             
-            # Create final structure
-            final_data = {
-                'metadata': {
+            # Create final structure; post options are ranked and written
+            # one at a time as the file is streamed out
+            sections = (
+                ('metadata', {
                     'generated_at': datetime.now().isoformat(),
                     'pipeline_version': '1.0.0',
                     'quality_score': quality_results.get('quality_score', 0)
-                },
-                'trend_info': trend_info,
-                'understanding_brief': understanding_brief,
-                'post_options': post_options,
-                'assets': {
+                }),
+                # Trend info summary
+                ('trend_info', {
+                    'keywords_analyzed': trend_results.get('keywords_analyzed', 0),
+                    'top_trending': [
+                        {
+                            'keyword': kw['keyword'],
+                            'score': round(kw['score'], 2)
+                        }
+                        for kw in (trend_results.get('top_keywords') or ())[:10]
+                    ],
+                    'recommended_hashtags': trend_results.get('hashtags', [])[:15]
+                }),
+                # Understanding brief
+                ('understanding_brief', {
+                    'content_analyzed': {
+                        'screenshots': screenshots.get('count', 0),
+                        'video_duration': video.get('duration', 0),
+                        'text_words': text.get('word_count', 0)
+                    },
+                    'key_insights': {
+                        'video_transcript_preview': video.get('transcript', '')[:500],
+                        'image_captions_sample': [
+                            cap.get('caption', '') 
+                            for cap in (screenshots.get('captions') or ())[:3]
+                        ],
+                        'game_summary': text.get('summary', '')[:300]
+                    }
+                }),
+                ('post_options', self._iter_post_options(validated_candidates, trend_results)),
+                ('assets', {
                     'images_dir': images_info.get('output_dir', ''),
                     'images_count': images_info.get('count', 0),
-                    'image_files': [os.path.basename(p) for p in images_info.get('paths', [])]
-                },
-                'recommendations': {
+                    'image_files': image_files
+                }),
+                ('recommendations', {
                     'best_option': 1,  # Default to first option
                     'posting_time': 'Peak engagement hours: 19:00-22:00 TR time',
                     'engagement_tips': [
@@ -181,13 +319,13 @@ class FinalizationAgent:
                         'Include a clear call-to-action in the caption',
                         'Use processed images for optimal Instagram display'
                     ]
-                }
-            }
+                })
+            )
             
             # Save JSON
             Path(os.path.dirname(output_path)).mkdir(parents=True, exist_ok=True)
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(final_data, f, ensure_ascii=False, indent=2)
+            with open(output_path, 'wb', buffering=1 << 16) as f:
+                _dump_json_sections(f, sections)
             
             logger.info(f"Created final JSON at {output_path}")
             return output_path
@@ -196,7 +334,7 @@ class FinalizationAgent:
             logger.error(f"Error creating final JSON: {e}")
             raise
     
-    def create_package_zip(self, json_path: str, images_dir: str, output_path: str) -> str:
+    def create_package_zip(self, json_path: str, images_dir: str, output_path: str) -> Tuple[str, int]:
         """
         Create final package ZIP file.
         
@@ -206,31 +344,36 @@ class FinalizationAgent:
             output_path: Path for output ZIP file
             
         Returns:
-            Path to created ZIP file
+            Tuple of (path to created ZIP file, ZIP size in bytes)
         """
         try:
             Path(os.path.dirname(output_path)).mkdir(parents=True, exist_ok=True)
             
-            with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                # Add JSON file
-                if os.path.exists(json_path):
-                    zipf.write(json_path, 'final_post.json')
-                    logger.info(f"Added JSON to package")
-                
-                # Add images
-                if os.path.exists(images_dir):
+            # Images are stored as-is (JPEG/PNG gain nothing from deflate);
+            # only the small text entries are compressed, at the fastest level
+            with open(output_path, 'wb') as zip_file:
+                with zipfile.ZipFile(zip_file, 'w', zipfile.ZIP_STORED) as zipf:
+                    # Add JSON file
+                    if os.path.exists(json_path):
+                        zipf.write(json_path, 'final_post.json',
+                                   compress_type=zipfile.ZIP_DEFLATED, compresslevel=1)
+                        logger.info(f"Added JSON to package")
+                    
+                    # Add images
                     image_count = 0
-                    for root, dirs, files in os.walk(images_dir):
-                        for file in files:
-                            if file.lower().endswith(('.jpg', '.jpeg', '.png')):
-                                file_path = os.path.join(root, file)
-                                arc_name = os.path.join('images', file)
-                                zipf.write(file_path, arc_name)
-                                image_count += 1
+                    for entry in _iter_image_entries(images_dir):
+                        arc_name = os.path.join('images', entry.name)
+                        zinfo = zipfile.ZipInfo.from_file(entry.path, arc_name)
+                        zinfo.compress_type = zipfile.ZIP_STORED
+                        # Copy in large chunks rather than zipfile's 8 KiB reads
+                        with open(entry.path, 'rb', buffering=0) as src, \
+                                zipf.open(zinfo, 'w') as dst:
+                            shutil.copyfileobj(src, dst, _ZIP_COPY_BUFSIZE)
+                        image_count += 1
                     logger.info(f"Added {image_count} images to package")
-                
-                # Add a README
-                readme_content = """# Social Media Content Package
+                    
+                    # Add a README
+                    readme_content = """# Social Media Content Package
 
 ## Contents
 - final_post.json: Complete post data with 3 content options
@@ -249,10 +392,15 @@ Each option includes:
 
 Generated with JoyCase1 Content Pipeline v1.0.0
 """
-                zipf.writestr('README.md', readme_content)
+                    zipf.writestr('README.md', readme_content,
+                                  compress_type=zipfile.ZIP_DEFLATED, compresslevel=1)
+                
+                # The central directory is written once ZipFile closes, so the
+                # end offset of the still-open file is the final archive size
+                package_size = zip_file.tell()
             
             logger.info(f"Created package ZIP at {output_path}")
-            return output_path
+            return output_path, package_size
             
         except Exception as e:
             logger.error(f"Error creating package ZIP: {e}")
@@ -295,15 +443,12 @@ Generated with JoyCase1 Content Pipeline v1.0.0
             
             # Create package ZIP
             zip_path = os.path.join(output_base, 'final_package.zip')
-            package_zip = self.create_package_zip(
+            package_zip, package_size = self.create_package_zip(
                 final_json,
                 images_dir,
                 zip_path
             )
             
-            # Calculate package size
-            package_size = os.path.getsize(package_zip) if os.path.exists(package_zip) else 0
-            
             return {
                 'status': 'success',
                 'final_json_path': final_json,
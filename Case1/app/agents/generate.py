@@ -3,6 +3,9 @@
 import os
 import logging
 import json
+import re
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional
 import openai
 from datetime import datetime
@@ -10,6 +13,110 @@ import random
 
 logger = logging.getLogger(__name__)
 
+_SYSTEM_PROMPT = "You are a creative social media content creator specializing in gaming content. Generate engaging Turkish content for Instagram."
+
+# Markdown code fence (optionally tagged json) anywhere in a model reply;
+# prose before or after the fence is ignored
+_FENCE_RE = re.compile(r'```(?:json)?\s*(.*?)\s*```', re.DOTALL)
+
+# Per-candidate instructions appended to the shared OpenAI prompt
+_PROMPT_VARIATIONS = (
+    "",
+    "\nMake this version more casual and friendly.",
+    "\nMake this version more exciting and action-oriented.",
+)
+
+# Deterministic post templates used when OpenAI is unavailable; built once
+_FALLBACK_TEMPLATES = (
+    {
+        'title': '🎮 En Yeni Mobil Oyun Deneyimi!',
+        'caption': """🎮 Muhteşem bir oyun deneyimi sizi bekliyor!
+
+Bu oyunda neler var?
+✨ Etkileyici grafikler ve görsel efektler
+🎯 Sürükleyici oynanış mekanikleri  
+🏆 Rekabetçi çok oyunculu modlar
+🎨 Benzersiz sanat tasarımı
+
+Oyunun öne çıkan özellikleri:
+• Kolay öğrenilir, ustalaşması zor oynanış
+• Düzenli içerik güncellemeleri
+• Aktif oyuncu topluluğu
+• Free-to-play model
+
+Hemen indir ve maceraya katıl! 🚀
+Arkadaşlarını etiketle ve birlikte oynayın! 👥
+
+📲 Şimdi ücretsiz indir!""",
+        'hashtags': ('#mobiloyun', '#oyun', '#gaming', '#mobilegaming', '#yenioyun', '#türkiyegaming', '#oyunsever', '#mobilgame', '#gametr', '#oyunönerisi', '#ücretsizoyun', '#eğlence')
+    },
+    {
+        'title': '🔥 Kaçırılmayacak Oyun Fırsatı!',
+        'caption': """🔥 Bu oyunu mutlaka denemelisiniz!
+
+Neden bu oyun?
+🌟 Özgün hikaye ve karakterler
+⚔️ Aksiyon dolu sahneler
+🗺️ Geniş keşif alanları
+💎 Ödüllendirici ilerleme sistemi
+
+Oyuncular ne diyor?
+"Yılın en iyi mobil oyunu!" ⭐⭐⭐⭐⭐
+"Bağımlılık yapıyor!" 
+"Grafikler muhteşem!"
+
+Özel özellikler:
+• PvP ve PvE modları
+• Klan sistemi ve takım savaşları
+• Haftalık etkinlikler ve turnuvalar
+• Kişiselleştirilebilir karakterler
+
+Sen de bu eğlenceye katıl! 🎊
+Yorumlarda düşüncelerini paylaş! 💬
+
+🎮 Hemen oynamaya başla!""",
+        'hashtags': ('#oyuntavsiyesi', '#mobiloyunlar', '#gameoftheday', '#oyunzamanı', '#türkoyun', '#gamer', '#mobilegamer', '#yenioyunlar', '#oyundünyası', '#gaming', '#oyuncu', '#mobilgaming')
+    },
+    {
+        'title': '⚡ Mobil Oyun Dünyasının Yeni Yıldızı!',
+        'caption': """⚡ Herkesin konuştuğu oyun burada!
+
+Oyunun büyüleyici dünyası:
+🏰 Epik maceralar ve görevler
+🐉 Efsanevi yaratıklar ve bosslar
+⚡ Güçlü yetenekler ve büyüler
+🎁 Günlük ödüller ve sürprizler
+
+Neler yapabilirsiniz?
+• Kendi kahramanınızı yaratın
+• Arkadaşlarınızla guild kurun
+• Dünya çapında oyuncularla yarışın
+• Eşsiz itemler toplayın
+
+Topluluk özellikleri:
+👥 Canlı sohbet sistemi
+🤝 Takım kurma ve işbirliği
+🏅 Liderlik tabloları
+🎯 Haftalık challengelar
+
+Maceranız başlasın! 🚀
+Hangi seviyeye ulaşabilirsiniz? 💪
+
+⬇️ Ücretsiz indirin ve oynayın!""",
+        'hashtags': ('#mobilegame', '#oyunlar', '#gamingcommunity', '#oyunaşkı', '#mobiloyunum', '#gamerlife', '#oyunbağımlısı', '#newgame', '#türkgamer', '#oyunönerisi', '#mobilegames', '#oyuntürkiye')
+    }
+)
+
+# Last-resort posts padding the candidate list; entry i fills slot i
+_STUB_POSTS = tuple(
+    {
+        'title': f'🎮 Muhteşem Oyun Deneyimi #{i + 1}',
+        'caption': 'Bu harika oyunu keşfedin! Eğlenceli oynanış, muhteşem grafikler ve daha fazlası sizi bekliyor. Hemen indirin ve oynamaya başlayın! 🚀 #oyun',
+        'hashtags': ('#mobiloyun', '#gaming', '#oyun', '#game', '#türkiye', '#yenioyun', '#mobilegaming', '#gamer', '#oyunönerisi', '#gametr', '#mobilgame', '#oyuntürkiye')
+    }
+    for i in range(3)
+)
+
 
 class ContentGenerationAgent:
     """Agent for generating social media content."""
@@ -53,7 +160,26 @@ class ContentGenerationAgent:
             response = self.client.chat.completions.create(
                 model="gpt-4o-mini",
                 messages=[
-                    {"role": "system", "content": "You are a creative social media content creator specializing in gaming content. Generate engaging Turkish content for Instagram."},
+                    {"role": "system", "content": _SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=max_tokens,
+                temperature=0.8
+            )
+            
+            return response.choices[0].message.content.strip()
+            
+        except Exception as e:
+            logger.error(f"OpenAI generation failed: {e}")
+            return None
+    
+    async def _agenerate_one(self, aclient, prompt: str, max_tokens: int = 500) -> Optional[str]:
+        """Async counterpart of generate_with_openai for a single prompt."""
+        try:
+            response = await aclient.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[
+                    {"role": "system", "content": _SYSTEM_PROMPT},
                     {"role": "user", "content": prompt}
                 ],
                 max_tokens=max_tokens,
@@ -66,6 +192,36 @@ class ContentGenerationAgent:
             logger.error(f"OpenAI generation failed: {e}")
             return None
     
+    async def _agenerate_all(self, prompts: List[str]) -> List[Optional[str]]:
+        """Send all prompts concurrently on a short-lived async client."""
+        async with openai.AsyncOpenAI(api_key=self.api_key) as aclient:
+            return await asyncio.gather(
+                *[self._agenerate_one(aclient, prompt) for prompt in prompts]
+            )
+    
+    def generate_batch_with_openai(self, prompts: List[str]) -> List[Optional[str]]:
+        """
+        Generate content for several prompts concurrently using OpenAI API.
+        
+        Args:
+            prompts: Prompts to send
+            
+        Returns:
+            Generated texts in prompt order (None for failed requests)
+        """
+        if not self.client:
+            return [None] * len(prompts)
+        
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self._agenerate_all(prompts))
+        
+        # Already inside an event loop (e.g. called from a FastAPI handler),
+        # so drive the requests from a separate thread with its own loop
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, self._agenerate_all(prompts)).result()
+    
     def fallback_generation(self, trend_data: Dict, content_data: Dict) -> List[Dict]:
         """
         Generate content using deterministic fallback templates.
@@ -77,96 +233,21 @@ class ContentGenerationAgent:
         Returns:
             List of generated post candidates
         """
-        templates = [
-            {
-                'title': '🎮 En Yeni Mobil Oyun Deneyimi!',
-                'caption': """🎮 Muhteşem bir oyun deneyimi sizi bekliyor!
-
-Bu oyunda neler var?
-✨ Etkileyici grafikler ve görsel efektler
-🎯 Sürükleyici oynanış mekanikleri  
-🏆 Rekabetçi çok oyunculu modlar
-🎨 Benzersiz sanat tasarımı
-
-Oyunun öne çıkan özellikleri:
-• Kolay öğrenilir, ustalaşması zor oynanış
-• Düzenli içerik güncellemeleri
-• Aktif oyuncu topluluğu
-• Free-to-play model
-
-Hemen indir ve maceraya katıl! 🚀
-Arkadaşlarını etiketle ve birlikte oynayın! 👥
-
-📲 Şimdi ücretsiz indir!""",
-                'hashtags': ['#mobiloyun', '#oyun', '#gaming', '#mobilegaming', '#yenioyun', '#türkiyegaming', '#oyunsever', '#mobilgame', '#gametr', '#oyunönerisi', '#ücretsizoyun', '#eğlence']
-            },
-            {
-                'title': '🔥 Kaçırılmayacak Oyun Fırsatı!',
-                'caption': """🔥 Bu oyunu mutlaka denemelisiniz!
-
-Neden bu oyun?
-🌟 Özgün hikaye ve karakterler
-⚔️ Aksiyon dolu sahneler
-🗺️ Geniş keşif alanları
-💎 Ödüllendirici ilerleme sistemi
-
-Oyuncular ne diyor?
-"Yılın en iyi mobil oyunu!" ⭐⭐⭐⭐⭐
-"Bağımlılık yapıyor!" 
-"Grafikler muhteşem!"
-
-Özel özellikler:
-• PvP ve PvE modları
-• Klan sistemi ve takım savaşları
-• Haftalık etkinlikler ve turnuvalar
-• Kişiselleştirilebilir karakterler
-
-Sen de bu eğlenceye katıl! 🎊
-Yorumlarda düşüncelerini paylaş! 💬
-
-🎮 Hemen oynamaya başla!""",
-                'hashtags': ['#oyuntavsiyesi', '#mobiloyunlar', '#gameoftheday', '#oyunzamanı', '#türkoyun', '#gamer', '#mobilegamer', '#yenioyunlar', '#oyundünyası', '#gaming', '#oyuncu', '#mobilgaming']
-            },
-            {
-                'title': '⚡ Mobil Oyun Dünyasının Yeni Yıldızı!',
-                'caption': """⚡ Herkesin konuştuğu oyun burada!
-
-Oyunun büyüleyici dünyası:
-🏰 Epik maceralar ve görevler
-🐉 Efsanevi yaratıklar ve bosslar
-⚡ Güçlü yetenekler ve büyüler
-🎁 Günlük ödüller ve sürprizler
-
-Neler yapabilirsiniz?
-• Kendi kahramanınızı yaratın
-• Arkadaşlarınızla guild kurun
-• Dünya çapında oyuncularla yarışın
-• Eşsiz itemler toplayın
-
-Topluluk özellikleri:
-👥 Canlı sohbet sistemi
-🤝 Takım kurma ve işbirliği
-🏅 Liderlik tabloları
-🎯 Haftalık challengelar
-
-Maceranız başlasın! 🚀
-Hangi seviyeye ulaşabilirsiniz? 💪
-
-⬇️ Ücretsiz indirin ve oynayın!""",
-                'hashtags': ['#mobilegame', '#oyunlar', '#gamingcommunity', '#oyunaşkı', '#mobiloyunum', '#gamerlife', '#oyunbağımlısı', '#newgame', '#türkgamer', '#oyunönerisi', '#mobilegames', '#oyuntürkiye']
-            }
-        ]
-        
-        # Select templates based on some variation
-        selected = random.sample(templates, min(3, len(templates)))
-        
-        # Add trending hashtags if available
+        trending_tags = None
         if trend_data and 'hashtags' in trend_data:
-            trending_tags = trend_data['hashtags'][:5]
-            for post in selected:
+            trending_tags = list(trend_data['hashtags'][:5])
+        
+        # Select templates based on some variation; only the hashtag list is
+        # rebuilt per post, the template strings are shared
+        selected = []
+        for template in random.sample(_FALLBACK_TEMPLATES, min(3, len(_FALLBACK_TEMPLATES))):
+            post = dict(template)
+            if trending_tags is None:
+                post['hashtags'] = list(template['hashtags'])
+            else:
                 # Mix trending with template hashtags
-                mixed_tags = trending_tags + post['hashtags'][:7]
-                post['hashtags'] = mixed_tags[:12]
+                post['hashtags'] = (trending_tags + list(template['hashtags'][:7]))[:12]
+            selected.append(post)
         
         return selected
     
@@ -235,47 +316,49 @@ Format the response as JSON with keys: title, caption, hashtags (array)"""
                 # Try OpenAI generation
                 logger.info("Attempting OpenAI generation")
                 
-                for i in range(3):
-                    prompt = self.create_prompt(trend_data, content_data)
-                    # Add variation instruction for each candidate
-                    if i == 1:
-                        prompt += "\nMake this version more casual and friendly."
-                    elif i == 2:
-                        prompt += "\nMake this version more exciting and action-oriented."
-                    
-                    result = self.generate_with_openai(prompt)
-                    
+                # Build the shared prompt once, then add a variation
+                # instruction for each candidate
+                base_prompt = self.create_prompt(trend_data, content_data)
+                prompts = [base_prompt + variation for variation in _PROMPT_VARIATIONS]
+                
+                # Request all variations concurrently
+                results = self.generate_batch_with_openai(prompts)
+                
+                for i, result in enumerate(results):
                     if result:
                         try:
                             # Try to parse as JSON
-                            if result.startswith('```json'):
-                                result = result[7:-3]  # Remove markdown code block
-                            elif result.startswith('```'):
-                                result = result[3:-3]
+                            # Remove markdown code block
+                            fence = _FENCE_RE.search(result)
+                            if fence:
+                                result = fence.group(1)
                             
                             post_data = json.loads(result)
                             
                             # Ensure all required fields
                             if 'title' in post_data and 'caption' in post_data and 'hashtags' in post_data:
                                 # Ensure hashtags is a list
-                                if isinstance(post_data['hashtags'], str):
-                                    post_data['hashtags'] = post_data['hashtags'].split()
+                                tags = post_data['hashtags']
+                                if isinstance(tags, str):
+                                    tags = tags.split()
                                 
-                                # Ensure hashtags start with #
+                                # Ensure hashtags start with #; only the kept 12 are touched
                                 post_data['hashtags'] = [
-                                    tag if tag.startswith('#') else f'#{tag}'
-                                    for tag in post_data['hashtags']
-                                ][:12]
+                                    tag if tag[:1] == '#' else '#' + tag
+                                    for tag in tags[:12]
+                                ]
                                 
                                 candidates.append(post_data)
                                 logger.info(f"Generated candidate {i+1} with OpenAI")
                             
                         except json.JSONDecodeError:
-                            # Try to extract content manually
-                            lines = result.split('\n')
+                            # Try to extract content manually: first line is the
+                            # title, the lines between it and the last are the caption
+                            first_line, _, rest = result.partition('\n')
+                            middle, has_middle, _ = rest.rpartition('\n')
                             post_data = {
-                                'title': lines[0][:60] if lines else 'Yeni Oyun Keşfi!',
-                                'caption': '\n'.join(lines[1:-1])[:2200] if len(lines) > 2 else result[:2200],
+                                'title': first_line[:60] or 'Yeni Oyun Keşfi!',
+                                'caption': middle[:2200] if has_middle else result[:2200],
                                 'hashtags': ['#mobiloyun', '#gaming', '#oyun', '#game', '#türkiye', '#yenioyun', '#mobilegaming', '#gamer', '#oyunönerisi', '#gametr', '#mobilgame', '#oyuntürkiye']
                             }
                             candidates.append(post_data)
@@ -288,12 +371,11 @@ Format the response as JSON with keys: title, caption, hashtags (array)"""
                 candidates.extend(fallback_posts[:3 - len(candidates)])
             
             # Ensure we have exactly 3 candidates
-            while len(candidates) < 3:
-                candidates.append({
-                    'title': f'🎮 Muhteşem Oyun Deneyimi #{len(candidates)+1}',
-                    'caption': f'Bu harika oyunu keşfedin! Eğlenceli oynanış, muhteşem grafikler ve daha fazlası sizi bekliyor. Hemen indirin ve oynamaya başlayın! 🚀 #oyun',
-                    'hashtags': ['#mobiloyun', '#gaming', '#oyun', '#game', '#türkiye', '#yenioyun', '#mobilegaming', '#gamer', '#oyunönerisi', '#gametr', '#mobilgame', '#oyuntürkiye']
-                })
+            if len(candidates) < 3:
+                candidates.extend(
+                    dict(stub, hashtags=list(stub['hashtags']))
+                    for stub in _STUB_POSTS[len(candidates):]
+                )
             
             return {
                 'status': 'success',
@@ -1,14 +1,147 @@
 """Trend Analysis Agent - Analyzes keywords and generates trending hashtags."""
 
+import functools
 import logging
 import re
+import threading
 from typing import List, Dict, Tuple
 from pytrends.request import TrendReq
 import time
 import random
+from itertools import islice
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
 
 logger = logging.getLogger(__name__)
 
+# Raw keywords considered per analysis
+_MAX_KEYWORDS = 50
+
+# Characters past the first line checked for commas to detect the file format
+_FORMAT_SAMPLE_CHARS = 256
+
+# Characters outside [\w\s-] stripped from keywords
+_KEYWORD_STRIP_RE = re.compile(r'[^\w\s-]')
+
+# Same filter for ASCII text as a str.translate table
+_ASCII_KEYWORD_STRIP = str.maketrans(
+    '', '', ''.join(chr(c) for c in range(128) if _KEYWORD_STRIP_RE.match(chr(c)))
+)
+
+# Substrings that earn a keyword the gaming bonus in fallback scoring
+_GAMING_TERMS = ('game', 'play', 'mobile', 'online', 'rpg', 'fps', 'mmo', 'pvp')
+
+
+def _build_gaming_automaton():
+    """Build an Aho-Corasick automaton over the gaming terms."""
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for term in _GAMING_TERMS:
+        automaton.add_word(term, term)
+    automaton.make_automaton()
+    return automaton
+
+
+_GAMING_AC = _build_gaming_automaton()
+
+
+def _has_gaming_term(keyword: str) -> bool:
+    """
+    Check whether a keyword contains any gaming term.
+    
+    Uses a single automaton pass when pyahocorasick is installed.
+    """
+    if _GAMING_AC is not None:
+        return next(_GAMING_AC.iter(keyword), None) is not None
+    return any(term in keyword for term in _GAMING_TERMS)
+
+
+@functools.lru_cache(maxsize=4096)
+def _fallback_score(keyword: str) -> float:
+    """Deterministic 0-100 score from keyword properties; memoized per keyword."""
+    # Shorter keywords are more likely to be popular
+    length = len(keyword)
+    base_score = 70.0 if length <= 5 else 60.0 if length <= 8 else 50.0
+    
+    # Bonus for common gaming terms
+    if _has_gaming_term(keyword):
+        base_score += 15
+    
+    # Add some variation based on alphabetical position
+    base_score += (ord(keyword[0]) - ord('a')) * 0.5
+    
+    return min(100, max(0, base_score))
+
+
+def _column_means(interest, keywords: Tuple[str, ...]) -> Dict[str, float]:
+    """Mean interest per keyword column, reduced in one vectorized pass."""
+    if interest.empty:
+        return {}
+    present = [keyword for keyword in keywords if keyword in interest.columns]
+    return {keyword: float(mean) for keyword, mean in interest[present].mean().items()}
+
+
+# Minimum gap in seconds between the end of one PyTrends batch and the next
+_TRENDS_MIN_INTERVAL = 0.5
+_TRENDS_PACE_LOCK = threading.Lock()
+_last_trends_fetch = 0.0
+
+
+@functools.lru_cache(maxsize=256)
+def _fetch_interest(pytrends: TrendReq, batch: Tuple[str, ...]) -> Tuple[Tuple[str, float, float], ...]:
+    """
+    Fetch mean 7-day and 30-day interest for a sorted keyword batch.
+    
+    Results are memoized per batch, so repeated batches skip both
+    requests and the rate-limit pacing. Failed fetches raise and are
+    not cached.
+    
+    Args:
+        pytrends: Initialized PyTrends client
+        batch: Sorted tuple of up to 5 keywords
+        
+    Returns:
+        Tuple of (keyword, score_7d, score_30d) for every keyword in the batch
+    """
+    global _last_trends_fetch
+    
+    # Space batches out to avoid rate limiting, waiting only for whatever
+    # part of the interval has not already passed since the last batch
+    with _TRENDS_PACE_LOCK:
+        wait = _last_trends_fetch + _TRENDS_MIN_INTERVAL - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        try:
+            # Get 7-day trends
+            pytrends.build_payload(
+                list(batch),
+                timeframe='now 7-d',
+                geo='TR'
+            )
+            interest_7d = pytrends.interest_over_time()
+            
+            # Get 30-day trends
+            pytrends.build_payload(
+                list(batch),
+                timeframe='today 1-m',
+                geo='TR'
+            )
+            interest_30d = pytrends.interest_over_time()
+        finally:
+            _last_trends_fetch = time.monotonic()
+    
+    means_7d = _column_means(interest_7d, batch)
+    means_30d = _column_means(interest_30d, batch)
+    
+    return tuple(
+        (keyword, means_7d.get(keyword, 0), means_30d.get(keyword, 0))
+        for keyword in batch
+    )
+
 
 class TrendAnalysisAgent:
     """Agent for analyzing keyword trends and generating hashtags."""
@@ -38,11 +171,13 @@ class TrendAnalysisAgent:
             Normalized keyword list
         """
         normalized = []
-        for keyword in keywords[:50]:  # Limit to first 50
+        for keyword in keywords[:_MAX_KEYWORDS]:
             # Clean and normalize
-            cleaned = keyword.strip().lower()
-            cleaned = re.sub(r'[^\w\s-]', '', cleaned)
-            cleaned = re.sub(r'\s+', ' ', cleaned)
+            cleaned = keyword.lower().translate(_ASCII_KEYWORD_STRIP)
+            if not cleaned.isascii():
+                # Turkish letters etc. need the Unicode-aware filter
+                cleaned = _KEYWORD_STRIP_RE.sub('', cleaned)
+            cleaned = ' '.join(cleaned.split())
             
             if cleaned and len(cleaned) > 2:
                 normalized.append(cleaned)
@@ -71,90 +206,52 @@ class TrendAnalysisAgent:
                         continue
                     
                     try:
-                        # Get 7-day trends
-                        self.pytrends.build_payload(
-                            batch,
-                            timeframe='now 7-d',
-                            geo='TR'
-                        )
-                        interest_7d = self.pytrends.interest_over_time()
-                        
-                        # Get 30-day trends
-                        self.pytrends.build_payload(
-                            batch,
-                            timeframe='today 1-m',
-                            geo='TR'
-                        )
-                        interest_30d = self.pytrends.interest_over_time()
+                        # Trends are relative within a batch, so the sorted
+                        # batch is a stable cache key
+                        interest = {
+                            keyword: (score_7d, score_30d)
+                            for keyword, score_7d, score_30d
+                            in _fetch_interest(self.pytrends, tuple(sorted(batch)))
+                        }
                         
                         # Calculate weighted scores
                         for keyword in batch:
-                            score_7d = 0
-                            score_30d = 0
-                            
-                            if not interest_7d.empty and keyword in interest_7d.columns:
-                                score_7d = interest_7d[keyword].mean()
-                            
-                            if not interest_30d.empty and keyword in interest_30d.columns:
-                                score_30d = interest_30d[keyword].mean()
+                            score_7d, score_30d = interest[keyword]
                             
                             # Weighted combination: 70% recent, 30% monthly
                             final_score = (0.7 * score_7d) + (0.3 * score_30d)
                             scores.append((keyword, final_score))
                         
-                        # Small delay to avoid rate limiting
-                        time.sleep(0.5)
-                        
                     except Exception as e:
                         logger.warning(f"Error getting trends for batch {batch}: {e}")
                         # Add with fallback score
-                        for keyword in batch:
-                            scores.append((keyword, self._fallback_score(keyword)))
+                        scores.extend(self._fallback_scores(batch))
                 
             except Exception as e:
                 logger.error(f"Error in trend analysis: {e}")
                 # Use fallback for all keywords
-                scores = [(kw, self._fallback_score(kw)) for kw in keywords]
+                scores = self._fallback_scores(keywords)
         else:
             # Fallback scoring when PyTrends is unavailable
             logger.info("Using fallback scoring (PyTrends unavailable)")
-            scores = [(kw, self._fallback_score(kw)) for kw in keywords]
+            scores = self._fallback_scores(keywords)
         
         # Sort by score (descending)
         scores.sort(key=lambda x: x[1], reverse=True)
         
         return scores[:15]  # Return top 15
     
-    def _fallback_score(self, keyword: str) -> float:
+    def _fallback_scores(self, keywords: List[str]) -> List[Tuple[str, float]]:
         """
-        Generate deterministic fallback score based on keyword properties.
+        Generate deterministic fallback scores based on keyword properties.
         
         Args:
-            keyword: The keyword to score
+            keywords: Keywords to score
             
         Returns:
-            Fallback score between 0 and 100
+            List of (keyword, score) tuples with scores between 0 and 100
         """
-        # Simple deterministic scoring based on keyword properties
-        base_score = 50.0
-        
-        # Bonus for shorter keywords (more likely to be popular)
-        if len(keyword) <= 5:
-            base_score += 20
-        elif len(keyword) <= 8:
-            base_score += 10
-        
-        # Bonus for common gaming terms
-        gaming_terms = ['game', 'play', 'mobile', 'online', 'rpg', 'fps', 'mmo', 'pvp']
-        for term in gaming_terms:
-            if term in keyword:
-                base_score += 15
-                break
-        
-        # Add some variation based on alphabetical position
-        base_score += (ord(keyword[0]) - ord('a')) * 0.5
-        
-        return min(100, max(0, base_score))
+        return [(keyword, _fallback_score(keyword)) for keyword in keywords]
     
     def generate_hashtags(self, keywords: List[Tuple[str, float]]) -> List[str]:
         """
@@ -166,29 +263,30 @@ class TrendAnalysisAgent:
         Returns:
             List of hashtags
         """
-        hashtags = set()
+        # Insertion-ordered set, so the first 20 tags generated are kept
+        hashtags = {}
         
         for keyword, score in keywords:
             # Clean keyword for hashtag use
             clean_kw = keyword.replace(' ', '').replace('-', '')
             
             # Base hashtag
-            hashtags.add(f"#{clean_kw}")
+            variations = [f"#{clean_kw}"]
             
             # Variations
             if score > 50:  # High-scoring keywords get more variations
-                hashtags.add(f"#{clean_kw}game")
-                hashtags.add(f"#mobile{clean_kw}")
+                variations += (f"#{clean_kw}game", f"#mobile{clean_kw}")
             
             if score > 70:  # Very high-scoring keywords
-                hashtags.add(f"#{clean_kw}gaming")
-                hashtags.add(f"#{clean_kw}tr")
+                variations += (f"#{clean_kw}gaming", f"#{clean_kw}tr")
             
-            # Stop if we have enough
-            if len(hashtags) >= 20:
-                break
+            for tag in variations:
+                hashtags[tag] = None
+                # Stop as soon as we have enough
+                if len(hashtags) == 20:
+                    return list(hashtags)
         
-        return list(hashtags)[:20]
+        return list(hashtags)
     
     def analyze(self, aso_keywords_path: str) -> Dict:
         """
@@ -205,12 +303,16 @@ class TrendAnalysisAgent:
             keywords = []
             try:
                 with open(aso_keywords_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    # Handle both comma and newline separated
-                    if ',' in content:
-                        keywords = content.split(',')
+                    # Handle both comma and newline separated; the first
+                    # line plus a short sample tells which format the file uses
+                    sample = f.readline() + f.read(_FORMAT_SAMPLE_CHARS)
+                    if ',' in sample:
+                        keywords = (sample + f.read()).split(',')
                     else:
-                        keywords = content.split('\n')
+                        # Finish the sample's last line, then read lazily:
+                        # only the first _MAX_KEYWORDS lines are ever used
+                        lines = (sample + f.readline()).splitlines()
+                        keywords = [*lines, *islice(f, max(0, _MAX_KEYWORDS - len(lines)))]
             except Exception as e:
                 logger.error(f"Error reading keywords file: {e}")
                 # Use sample keywords as fallback
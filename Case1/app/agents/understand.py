@@ -2,14 +2,79 @@
 
 import os
 import logging
-from typing import Dict, List, Optional
+import hashlib
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Tuple, Union
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 import torch
+import transformers
 from transformers import BlipProcessor, BlipForConditionalGeneration
 from PIL import Image
 
+try:
+    import av
+except ImportError:
+    av = None
+
+try:
+    from torchvision.transforms import v2
+except ImportError:
+    v2 = None
+
 logger = logging.getLogger(__name__)
 
+# Screenshot extensions BLIP can caption, lower-case for str.endswith
+_IMG_EXTS = ('.jpg', '.jpeg', '.png', '.bmp', '.gif')
+
+# Default on-disk caption cache; CAPTION_CACHE_PATH overrides, empty disables
+_CAPTION_CACHE_PATH = './cache/captions.sqlite'
+
+# Keys per SELECT, below SQLite's bound-parameter limit
+_CACHE_LOOKUP_CHUNK = 500
+
+# Caption length cap; BLIP screenshot captions rarely exceed ~15 tokens
+_CAPTION_MAX_NEW_TOKENS = 24
+
+# Characters read per chunk when counting words past the stored text
+_TEXT_CHUNK_CHARS = 1 << 16
+
+# Default directory for the traced BLIP vision encoder; BLIP_ENCODER_CACHE
+# overrides, empty disables tracing
+_ENCODER_CACHE_DIR = './cache'
+
+
+def _caption_key(image_path: Union[str, Image.Image]) -> Optional[str]:
+    """Content hash identifying an image in the caption cache, or None if unreadable."""
+    try:
+        digest = hashlib.blake2b(digest_size=16)
+        if isinstance(image_path, Image.Image):
+            # Decoded frame: hash the pixels along with their layout
+            digest.update(f"{image_path.mode}{image_path.size}".encode())
+            digest.update(image_path.tobytes())
+            return digest.hexdigest()
+        with open(image_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+    except OSError:
+        return None
+
+
+class _VisionEncoder(torch.nn.Module):
+    """BLIP vision model returning plain tuples, so it can be traced."""
+    
+    def __init__(self, vision_model):
+        super().__init__()
+        self.vision_model = vision_model
+    
+    def forward(self, pixel_values):
+        return self.vision_model(pixel_values=pixel_values, return_dict=False)
+
 
 class ContentUnderstandingAgent:
     """Agent for understanding multimedia content."""
@@ -18,20 +83,56 @@ class ContentUnderstandingAgent:
         """Initialize the content understanding agent."""
         self.blip_processor = None
         self.blip_model = None
+        self._gpu_preprocess = None
+        self._caption_cache = None
+        # Namespaces cache keys by model and generation settings (set in _init_models)
+        self._caption_key_prefix = ''
+        self._cache_lock = threading.Lock()
+        # Concurrent pipeline runs share the model; generate() is not thread-safe
+        self._model_lock = threading.Lock()
         self._init_models()
+        self._init_caption_cache()
     
     def _init_models(self):
-        """Initialize BLIP model for image captioning."""
+        """
+        Initialize BLIP model for image captioning.
+        
+        BLIP_PRECISION selects the weights: fp32 (default), bf16, or int8
+        (dynamic quantization of Linear layers, CPU only; GPUs use bf16).
+        """
         try:
+            precision = os.getenv('BLIP_PRECISION', 'fp32').lower()
+            if precision == 'int8' and torch.cuda.is_available():
+                # Dynamic quantization is CPU-only; bf16 is the GPU equivalent
+                precision = 'bf16'
+            
             # Use small BLIP model for CPU efficiency
             model_name = "Salesforce/blip-image-captioning-base"
             self.blip_processor = BlipProcessor.from_pretrained(model_name)
-            self.blip_model = BlipForConditionalGeneration.from_pretrained(model_name)
+            # low_cpu_mem_usage loads the (safetensors) weights straight into
+            # the model instead of allocating a randomly initialised copy first
+            self.blip_model = BlipForConditionalGeneration.from_pretrained(
+                model_name,
+                low_cpu_mem_usage=True,
+                **({'torch_dtype': torch.bfloat16} if precision == 'bf16' else {})
+            )
             
             # Move to CPU and set to eval mode
             self.blip_model.eval()
             if torch.cuda.is_available():
                 self.blip_model = self.blip_model.cuda()
+            elif precision == 'int8':
+                self.blip_model = torch.ao.quantization.quantize_dynamic(
+                    self.blip_model, {torch.nn.Linear}, dtype=torch.qint8
+                )
+            
+            self._gpu_preprocess = self._build_gpu_preprocess()
+            # Captions cached under other weights or settings are never reused
+            self._caption_key_prefix = f"{model_name}:{precision}:{_CAPTION_MAX_NEW_TOKENS}:"
+            
+            # A trace saved by an earlier start skips torch.compile warm-up
+            if not self._load_traced_encoder(precision):
+                self._compile_model()
             
             logger.info("BLIP model initialized successfully")
         except Exception as e:
@@ -39,6 +140,175 @@ class ContentUnderstandingAgent:
             self.blip_processor = None
             self.blip_model = None
     
+    def _init_caption_cache(self):
+        """Open the SQLite caption cache; captioning works uncached if this fails."""
+        cache_path = os.getenv('CAPTION_CACHE_PATH', _CAPTION_CACHE_PATH)
+        if not cache_path:
+            return
+        
+        try:
+            Path(os.path.dirname(cache_path) or '.').mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(cache_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS captions (key TEXT PRIMARY KEY, caption TEXT)")
+            conn.commit()
+            self._caption_cache = conn
+            logger.info(f"Caption cache opened at {cache_path}")
+        except Exception as e:
+            logger.warning(f"Caption cache unavailable at {cache_path}: {e}")
+    
+    def _cached_captions(self, keys: List[Optional[str]]) -> Dict[str, str]:
+        """Look up cached captions for the given image keys."""
+        wanted = [key for key in dict.fromkeys(keys) if key]
+        if self._caption_cache is None or not wanted:
+            return {}
+        
+        found = {}
+        try:
+            with self._cache_lock:
+                for start in range(0, len(wanted), _CACHE_LOOKUP_CHUNK):
+                    chunk = wanted[start:start + _CACHE_LOOKUP_CHUNK]
+                    found.update(self._caption_cache.execute(
+                        f"SELECT key, caption FROM captions WHERE key IN ({','.join('?' * len(chunk))})",
+                        chunk
+                    ).fetchall())
+        except Exception as e:
+            logger.warning(f"Caption cache lookup failed: {e}")
+        return found
+    
+    def _store_captions(self, entries: List[Tuple[str, str]]):
+        """Write freshly generated (key, caption) pairs to the cache."""
+        if self._caption_cache is None or not entries:
+            return
+        
+        try:
+            with self._cache_lock, self._caption_cache:
+                self._caption_cache.executemany(
+                    "INSERT OR REPLACE INTO captions (key, caption) VALUES (?, ?)", entries
+                )
+        except Exception as e:
+            logger.warning(f"Caption cache write failed: {e}")
+    
+    def _load_traced_encoder(self, precision: str) -> bool:
+        """
+        Swap in a TorchScript trace of the BLIP vision encoder, cached on disk.
+        
+        The first start traces the encoder and saves it; later starts load
+        the saved trace instead of tracing or compiling again. The trace
+        holds the weights, so the file name includes the model and its
+        checkpoint revision as well as the transformers and torch versions,
+        precision and device; an upgrade never loads a stale trace.
+        
+        Args:
+            precision: BLIP_PRECISION the weights were loaded with
+            
+        Returns:
+            True if the traced encoder is in use
+        """
+        cache_dir = os.getenv('BLIP_ENCODER_CACHE', _ENCODER_CACHE_DIR)
+        if not cache_dir:
+            return False
+        
+        device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        config = self.blip_model.config
+        model_id = config.name_or_path.replace('/', '--')
+        revision = getattr(config, '_commit_hash', None) or 'local'
+        trace_path = os.path.join(
+            cache_dir,
+            f"blip_vision-{model_id}-{revision}-{transformers.__version__}-"
+            f"{torch.__version__}-{precision}-{device}.pt"
+        )
+        eager_vision = self.blip_model.vision_model
+        try:
+            example = self._prepare_inputs([Image.new('RGB', (384, 384))])['pixel_values']
+            if os.path.exists(trace_path):
+                traced = torch.jit.load(trace_path, map_location=device)
+            else:
+                with torch.no_grad():
+                    traced = torch.jit.trace(_VisionEncoder(eager_vision), (example,), strict=False)
+                Path(cache_dir).mkdir(parents=True, exist_ok=True)
+                # Save then rename, so other workers never load a partial file
+                tmp_path = f"{trace_path}.{os.getpid()}.tmp"
+                torch.jit.save(traced, tmp_path)
+                os.replace(tmp_path, trace_path)
+            
+            # Check the trace runs (and warm it up) before relying on it
+            with torch.inference_mode():
+                traced(pixel_values=example)
+            self.blip_model.vision_model = traced
+            
+            logger.info(f"BLIP vision encoder loaded from trace {trace_path}")
+            return True
+        except Exception as e:
+            logger.warning(f"Traced BLIP vision encoder unavailable, using eager module: {e}")
+            self.blip_model.vision_model = eager_vision
+            return False
+    
+    def _compile_model(self):
+        """
+        Compile the BLIP vision encoder with torch.compile and warm it up.
+        
+        Only the vision encoder is compiled: the processor always resizes
+        to 384x384, so its input shape is fixed, whereas the text decoder
+        sees a new sequence length at every generate step. Set
+        BLIP_COMPILE=0 to skip; any compile failure falls back to eager.
+        """
+        if not hasattr(torch, 'compile') or os.getenv('BLIP_COMPILE', '1') == '0':
+            return
+        
+        eager_vision = self.blip_model.vision_model
+        try:
+            # CUDA graphs only exist on GPU; plain inductor fusion on CPU
+            mode = "reduce-overhead" if torch.cuda.is_available() else "default"
+            self.blip_model.vision_model = torch.compile(eager_vision, mode=mode)
+            
+            # Warm up so the first request doesn't pay for compilation; only
+            # the encoder needs tracing, so skip the decoder entirely
+            inputs = self._prepare_inputs([Image.new('RGB', (384, 384))])
+            with torch.inference_mode():
+                self.blip_model.vision_model(pixel_values=inputs['pixel_values'])
+            
+            logger.info(f"BLIP vision encoder compiled (mode={mode})")
+        except Exception as e:
+            logger.warning(f"torch.compile unavailable for BLIP, using eager mode: {e}")
+            self.blip_model.vision_model = eager_vision
+    
+    def _build_gpu_preprocess(self):
+        """
+        Build a torchvision pipeline doing BlipProcessor's resize and normalize.
+        
+        Returns:
+            The transform to run on CUDA tensors, or None without CUDA or
+            torchvision (the BlipProcessor path is used then)
+        """
+        if v2 is None or not torch.cuda.is_available():
+            return None
+        
+        image_processor = self.blip_processor.image_processor
+        size = (image_processor.size['height'], image_processor.size['width'])
+        return v2.Compose([
+            v2.Resize(size, interpolation=v2.InterpolationMode.BICUBIC, antialias=True),
+            v2.ToDtype(torch.float32, scale=True),
+            v2.Normalize(mean=image_processor.image_mean, std=image_processor.image_std)
+        ])
+    
+    def _prepare_inputs(self, images: List[Image.Image]) -> Dict:
+        """Process images into model inputs on the model's device and dtype."""
+        if self._gpu_preprocess is not None:
+            # Upload the uint8 pixels and resize/normalize on the GPU
+            pixel_values = torch.stack([
+                self._gpu_preprocess(v2.functional.pil_to_tensor(img).cuda(non_blocking=True))
+                for img in images
+            ])
+            return {'pixel_values': pixel_values.to(self.blip_model.dtype)}
+        
+        inputs = self.blip_processor(images=images, return_tensors="pt")
+        if torch.cuda.is_available():
+            inputs = {k: v.cuda() for k, v in inputs.items()}
+        # Match pixel values to the weights (bf16 when BLIP_PRECISION=bf16)
+        inputs['pixel_values'] = inputs['pixel_values'].to(self.blip_model.dtype)
+        return inputs
+    
     def caption_image(self, image_path: str) -> str:
         """
         Generate caption for an image using BLIP.
@@ -49,35 +319,173 @@ class ContentUnderstandingAgent:
         Returns:
             Generated caption text
         """
-        try:
-            if not self.blip_model or not self.blip_processor:
-                return "Image captioning unavailable"
-            
-            # Load and process image
-            image = Image.open(image_path).convert('RGB')
-            
-            # Generate caption
-            inputs = self.blip_processor(image, return_tensors="pt")
-            if torch.cuda.is_available():
-                inputs = {k: v.cuda() for k, v in inputs.items()}
+        return self.caption_images([image_path])[0]
+    
+    def _load_batch(self, image_paths: List[Union[str, Image.Image]], indices: List[int]) -> Tuple[List[int], Optional[Dict]]:
+        """
+        Decode and preprocess one batch of images.
+        
+        Args:
+            image_paths: Paths (or decoded images) of all images being captioned
+            indices: Positions in image_paths that make up this batch
             
-            with torch.no_grad():
-                out = self.blip_model.generate(**inputs, max_length=50)
+        Returns:
+            Tuple of (positions that loaded, model inputs or None if none loaded)
+        """
+        loaded = []
+        images = []
+        for index in indices:
+            try:
+                if isinstance(image_paths[index], Image.Image):
+                    img = image_paths[index]
+                    images.append(img if img.mode == 'RGB' else img.convert('RGB'))
+                else:
+                    with Image.open(image_paths[index]) as img:
+                        images.append(img.convert('RGB'))
+                loaded.append(index)
+            except Exception as e:
+                logger.error(f"Error captioning image {image_paths[index]}: {e}")
+        
+        return loaded, self._prepare_inputs(images) if images else None
+    
+    def caption_images(self, image_paths: List[Union[str, Image.Image]], batch_size: int = 8) -> List[str]:
+        """
+        Generate captions for several images with batched BLIP inference.
+        
+        Images are captioned batch_size at a time, so a single generate call
+        amortizes the model's per-call overhead, and the next batch is
+        decoded on a background thread while the current one is captioned.
+        Images whose content is already in the caption cache skip BLIP.
+        
+        Args:
+            image_paths: Paths to the image files, or already decoded images
+            batch_size: Number of images per forward pass
             
-            caption = self.blip_processor.decode(out[0], skip_special_tokens=True)
-            return caption
+        Returns:
+            Generated caption per image, in input order
+        """
+        if not self.blip_model or not self.blip_processor:
+            return ["Image captioning unavailable"] * len(image_paths)
+        
+        captions = ["Failed to caption image"] * len(image_paths)
+        
+        # Reuse captions of images seen before (by content hash)
+        if self._caption_cache is not None:
+            keys = [_caption_key(path) for path in image_paths]
+            keys = [self._caption_key_prefix + key if key else None for key in keys]
+        else:
+            keys = [None] * len(image_paths)
+        cached = self._cached_captions(keys)
+        todo = []
+        for index, key in enumerate(keys):
+            if key in cached:
+                captions[index] = cached[key]
+            else:
+                todo.append(index)
+        
+        batches = [todo[start:start + batch_size] for start in range(0, len(todo), batch_size)]
+        if not batches:
+            return captions
+        
+        fresh = []
+        
+        with ThreadPoolExecutor(max_workers=1) as loader:
+            pending = loader.submit(self._load_batch, image_paths, batches[0])
+            for position, batch in enumerate(batches):
+                batch_paths = [image_paths[index] for index in batch]
+                try:
+                    indices, inputs = pending.result()
+                except Exception as e:
+                    logger.error(f"Error preparing images {batch_paths}: {e}")
+                    indices, inputs = [], None
+                
+                # Prefetch the next batch before running the model
+                if position + 1 < len(batches):
+                    pending = loader.submit(self._load_batch, image_paths, batches[position + 1])
+                
+                if inputs is None:
+                    continue
+                
+                try:
+                    # Generate captions for the whole batch. generate() runs the
+                    # vision encoder once per batch and feeds the embeddings to
+                    # every decoder step, so there is no encoder work to hoist
+                    with self._model_lock, torch.inference_mode():
+                        out = self.blip_model.generate(
+                            **inputs,
+                            max_new_tokens=_CAPTION_MAX_NEW_TOKENS,
+                            num_beams=1,
+                            do_sample=False,
+                            use_cache=True
+                        )
+                    
+                    decoded = self.blip_processor.batch_decode(out, skip_special_tokens=True)
+                    for index, caption in zip(indices, decoded):
+                        captions[index] = caption
+                        if keys[index]:
+                            fresh.append((keys[index], caption))
+                        
+                except Exception as e:
+                    logger.error(f"Error captioning images {batch_paths}: {e}")
+        
+        self._store_captions(fresh)
+        return captions
+    
+    def _decode_keyframes(
+        self,
+        video_file: str,
+        interval_seconds: float = 2.0,
+        max_frames: int = 20
+    ) -> List[Image.Image]:
+        """
+        Decode keyframes in memory with PyAV, at most one per interval.
+        
+        Only keyframes are decoded, and frames go straight to BLIP instead
+        of being written to and re-read from disk.
+        
+        Args:
+            video_file: Path to the video
+            interval_seconds: Minimum spacing between kept frames
+            max_frames: Maximum number of frames to return
             
+        Returns:
+            Decoded frames, or an empty list if PyAV could not decode the video
+        """
+        frames = []
+        try:
+            with av.open(video_file) as container:
+                stream = container.streams.video[0]
+                stream.codec_context.skip_frame = 'NONKEY'
+                
+                next_time = 0.0
+                for frame in container.decode(stream):
+                    if frame.time is None or frame.time < next_time:
+                        continue
+                    frames.append(frame.to_image())
+                    if len(frames) >= max_frames:
+                        break
+                    next_time = frame.time + interval_seconds
         except Exception as e:
-            logger.error(f"Error captioning image {image_path}: {e}")
-            return f"Failed to caption image"
+            logger.warning(f"Keyframe decode failed for {video_file}, falling back to ffmpeg: {e}")
+            return []
+        
+        logger.info(f"Decoded {len(frames)} keyframes from {video_file}")
+        return frames
     
-    def analyze_screenshots(self, screenshot_dir: str, max_images: int = 20) -> List[Dict]:
+    def analyze_screenshots(
+        self,
+        screenshot_dir: str,
+        max_images: int = 20,
+        image_files: Optional[List[str]] = None
+    ) -> List[Dict]:
         """
         Analyze screenshot images and generate captions.
         
         Args:
             screenshot_dir: Directory containing screenshots
             max_images: Maximum number of images to process
+            image_files: Screenshot paths already listed from screenshot_dir;
+                the directory is only scanned when omitted
             
         Returns:
             List of image analysis results
@@ -85,24 +493,30 @@ class ContentUnderstandingAgent:
         results = []
         
         try:
-            # Get image files
-            image_extensions = {'.jpg', '.jpeg', '.png', '.bmp', '.gif'}
-            image_files = []
-            
-            if os.path.exists(screenshot_dir):
-                for file in os.listdir(screenshot_dir):
-                    if any(file.lower().endswith(ext) for ext in image_extensions):
-                        image_files.append(os.path.join(screenshot_dir, file))
+            # Get image files in a single directory pass, unless already listed
+            if image_files is None:
+                image_files = []
+                
+                if os.path.exists(screenshot_dir):
+                    with os.scandir(screenshot_dir) as it:
+                        image_files = [
+                            entry.path for entry in it
+                            if entry.name.lower().endswith(_IMG_EXTS) and entry.is_file()
+                        ]
             
             # Process images
-            for image_path in image_files[:max_images]:
-                caption = self.caption_image(image_path)
+            image_files = image_files[:max_images]
+            start = time.perf_counter()
+            for image_path, caption in zip(image_files, self.caption_images(image_files)):
                 results.append({
                     'file': os.path.basename(image_path),
                     'caption': caption,
                     'path': image_path
                 })
-                logger.info(f"Captioned {os.path.basename(image_path)}: {caption[:50]}...")
+                logger.debug(f"Captioned {os.path.basename(image_path)}: {caption[:50]}...")
+            
+            if results:
+                logger.info(f"Captioned {len(results)} screenshots in {time.perf_counter() - start:.2f}s")
             
             if not results:
                 # Add placeholder if no images found
@@ -122,13 +536,20 @@ class ContentUnderstandingAgent:
         
         return results
     
-    def analyze_video(self, gameplay_dir: str, utils_media) -> Dict:
+    def analyze_video(
+        self,
+        gameplay_dir: str,
+        utils_media,
+        video_files: Optional[List[str]] = None
+    ) -> Dict:
         """
         Analyze video content including frames and audio transcript.
         
         Args:
             gameplay_dir: Directory containing gameplay videos
             utils_media: Media utilities module for video processing
+            video_files: Video paths already listed from gameplay_dir; the
+                directory is only scanned when omitted
             
         Returns:
             Video analysis results
@@ -143,9 +564,9 @@ class ContentUnderstandingAgent:
         try:
             # Find first video file
             video_extensions = {'.mp4', '.avi', '.mov', '.mkv', '.webm'}
-            video_file = None
+            video_file = video_files[0] if video_files else None
             
-            if os.path.exists(gameplay_dir):
+            if video_files is None and os.path.exists(gameplay_dir):
                 for file in os.listdir(gameplay_dir):
                     if any(file.lower().endswith(ext) for ext in video_extensions):
                         video_file = os.path.join(gameplay_dir, file)
@@ -167,31 +588,42 @@ class ContentUnderstandingAgent:
             transcript = utils_media.extract_audio_transcript(video_file)
             result['transcript'] = transcript[:4000] if transcript else "No audio transcript available"
             
-            # Extract and caption frames
-            logger.info(f"Extracting frames from {video_file}")
-            temp_frames_dir = os.path.join('./temp', 'frames')
-            frame_paths = utils_media.extract_frames_from_video(
-                video_file, 
-                temp_frames_dir,
-                interval_seconds=2.0,
-                max_frames=20
-            )
+            start = time.perf_counter()
             
-            # Caption extracted frames
-            for frame_path in frame_paths[:20]:
-                caption = self.caption_image(frame_path)
+            # Decode keyframes in memory when PyAV is available
+            frames = self._decode_keyframes(video_file, interval_seconds=2.0, max_frames=20) if av else []
+            for index, caption in enumerate(self.caption_images(frames)):
                 result['frame_captions'].append({
-                    'frame': os.path.basename(frame_path),
+                    'frame': f"frame_{index:04d}.jpg",
                     'caption': caption
                 })
             
-            # Clean up temp frames
-            try:
-                import shutil
-                if os.path.exists(temp_frames_dir):
-                    shutil.rmtree(temp_frames_dir)
-            except:
-                pass
+            if not frames:
+                # Extract and caption frames
+                logger.info(f"Extracting frames from {video_file}")
+                # Per-run directory, so concurrent runs never see or delete each other's frames
+                Path('./temp').mkdir(parents=True, exist_ok=True)
+                temp_frames_dir = tempfile.mkdtemp(prefix='frames-', dir='./temp')
+                frame_paths = utils_media.extract_frames_from_video(
+                    video_file, 
+                    temp_frames_dir,
+                    interval_seconds=2.0,
+                    max_frames=20
+                )
+                
+                # Caption extracted frames
+                frame_paths = frame_paths[:20]
+                for frame_path, caption in zip(frame_paths, self.caption_images(frame_paths)):
+                    result['frame_captions'].append({
+                        'frame': os.path.basename(frame_path),
+                        'caption': caption
+                    })
+                
+                # Clean up temp frames
+                shutil.rmtree(temp_frames_dir, ignore_errors=True)
+            
+            logger.info(f"Extracted and captioned {len(result['frame_captions'])} frames "
+                        f"in {time.perf_counter() - start:.2f}s")
             
         except Exception as e:
             logger.error(f"Error analyzing video: {e}")
@@ -218,11 +650,22 @@ class ContentUnderstandingAgent:
         try:
             if os.path.exists(game_file):
                 with open(game_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
+                    # Only the first 4000 chars are kept
+                    content = f.read(4000)
+                    word_count = len(content.split())
+                    
+                    # Count the rest in chunks instead of loading the whole file
+                    previous = content
+                    for chunk in iter(lambda: f.read(_TEXT_CHUNK_CHARS), ''):
+                        word_count += len(chunk.split())
+                        if not previous[-1].isspace() and not chunk[0].isspace():
+                            # One word straddles the chunk boundary
+                            word_count -= 1
+                        previous = chunk
                 
                 # Store content (limited to 4000 chars)
-                result['content'] = content[:4000]
-                result['word_count'] = len(content.split())
+                result['content'] = content
+                result['word_count'] = word_count
                 
                 # Create simple summary (first 500 chars)
                 result['summary'] = content[:500] + ('...' if len(content) > 500 else '')
@@ -256,14 +699,16 @@ class ContentUnderstandingAgent:
             # Analyze screenshots
             logger.info(f"Analyzing screenshots from {inputs.get('screenshot_dir')}")
             screenshot_analysis = self.analyze_screenshots(
-                inputs.get('screenshot_dir', './screenshot')
+                inputs.get('screenshot_dir', './screenshot'),
+                image_files=inputs.get('screenshot_files')
             )
             
             # Analyze video
             logger.info(f"Analyzing video from {inputs.get('gameplay_dir')}")
             video_analysis = self.analyze_video(
                 inputs.get('gameplay_dir', './Gameplay'),
-                utils_media
+                utils_media,
+                video_files=inputs.get('video_files')
             )
             
             # Analyze text
@@ -1,10 +1,13 @@
 """Main controller for orchestrating the content pipeline."""
 
 import os
+import json
 import logging
+import uuid
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
 
 from app.agents.trend import TrendAnalysisAgent
 from app.agents.understand import ContentUnderstandingAgent
@@ -31,13 +34,26 @@ class ContentPipelineController:
         self._initialize_agents()
     
     def _initialize_agents(self):
-        """Initialize all pipeline agents."""
+        """
+        Initialize all pipeline agents.
+        
+        Agents are constructed concurrently so the BLIP model load in
+        ContentUnderstandingAgent overlaps with the other agents' setup.
+        """
+        factories = {
+            'trend': TrendAnalysisAgent,
+            'understand': ContentUnderstandingAgent,
+            'generate': lambda: ContentGenerationAgent(self.openai_api_key),
+            'quality': QualityControlAgent,
+            'finalize': FinalizationAgent
+        }
+        
         try:
-            self.agents['trend'] = TrendAnalysisAgent()
-            self.agents['understand'] = ContentUnderstandingAgent()
-            self.agents['generate'] = ContentGenerationAgent(self.openai_api_key)
-            self.agents['quality'] = QualityControlAgent()
-            self.agents['finalize'] = FinalizationAgent()
+            with ThreadPoolExecutor(max_workers=len(factories)) as executor:
+                futures = {name: executor.submit(factory) for name, factory in factories.items()}
+                # Collect in declaration order; result() re-raises a failed constructor
+                for name, future in futures.items():
+                    self.agents[name] = future.result()
             logger.info("All agents initialized successfully")
         except Exception as e:
             logger.error(f"Error initializing agents: {e}")
@@ -72,6 +88,25 @@ class ContentPipelineController:
                 game_file=kwargs.get('game_file')
             )
     
+    def _record_stage(self, results: Dict, results_stream, stage: str, stage_result: Dict):
+        """
+        Append a stage result to the run's pipeline.jsonl and keep a summary.
+        
+        The full result goes to disk; the in-memory copy drops 'full_data'
+        (every caption, the full transcript and text), which is only needed
+        by the later stages that already receive it directly.
+        
+        Args:
+            results: Pipeline results being built
+            results_stream: Line-buffered pipeline.jsonl handle
+            stage: Stage name
+            stage_result: Result returned by the stage
+        """
+        results_stream.write(
+            json.dumps({'stage': stage, 'data': stage_result}, ensure_ascii=False, default=str) + '\n'
+        )
+        results['stages'][stage] = {k: v for k, v in stage_result.items() if k != 'full_data'}
+    
     def run_pipeline(self, mode: str = 'local', **kwargs) -> Dict:
         """
         Run the complete content generation pipeline.
@@ -83,9 +118,10 @@ class ContentPipelineController:
         Returns:
             Pipeline execution results
         """
-        # Create output directory with timestamp
+        # Create output directory with timestamp; the random suffix keeps
+        # runs started in the same second apart
         timestamp = datetime.now().strftime('%Y%m%d-%H%M%S')
-        output_base = os.path.join('./outputs', f'run-{timestamp}')
+        output_base = os.path.join('./outputs', f'run-{timestamp}-{uuid.uuid4().hex[:8]}')
         Path(output_base).mkdir(parents=True, exist_ok=True)
         
         results = {
@@ -96,21 +132,24 @@ class ContentPipelineController:
             'stages': {}
         }
         
+        # Stage results are streamed here as they complete
+        results_stream = open(os.path.join(output_base, 'pipeline.jsonl'), 'a', encoding='utf-8', buffering=1)
+        
         try:
             # Stage 1: Prepare inputs
             logger.info(f"Stage 1: Preparing inputs (mode: {mode})")
             inputs = self.prepare_inputs(mode, **kwargs)
-            results['stages']['input_preparation'] = {
+            self._record_stage(results, results_stream, 'input_preparation', {
                 'status': 'success',
                 'inputs': inputs
-            }
+            })
             
             # Stage 2: Trend Analysis
             logger.info("Stage 2: Running trend analysis")
             trend_results = self.agents['trend'].analyze(
                 inputs.get('aso_file', './asokeywords.txt')
             )
-            results['stages']['trend_analysis'] = trend_results
+            self._record_stage(results, results_stream, 'trend_analysis', trend_results)
             
             # Stage 3: Content Understanding
             logger.info("Stage 3: Running content understanding")
@@ -118,7 +157,7 @@ class ContentPipelineController:
                 inputs, 
                 media
             )
-            results['stages']['content_understanding'] = understanding_results
+            self._record_stage(results, results_stream, 'content_understanding', understanding_results)
             
             # Stage 4: Content Generation
             logger.info("Stage 4: Running content generation")
@@ -126,28 +165,13 @@ class ContentPipelineController:
                 trend_results,
                 understanding_results
             )
-            results['stages']['content_generation'] = generation_results
+            self._record_stage(results, results_stream, 'content_generation', generation_results)
             
             # Stage 5: Quality Control
             logger.info("Stage 5: Running quality control")
             
-            # Collect image paths for processing
-            image_paths = []
-            
-            # Get screenshot paths
-            screenshot_dir = inputs.get('screenshot_dir')
-            if screenshot_dir and os.path.exists(screenshot_dir):
-                for file in os.listdir(screenshot_dir):
-                    if file.lower().endswith(('.jpg', '.jpeg', '.png')):
-                        image_paths.append(os.path.join(screenshot_dir, file))
-            
-            # Get sample images from understanding results if available
-            if 'full_data' in understanding_results:
-                screenshot_data = understanding_results['full_data'].get('all_screenshot_captions', [])
-                for item in screenshot_data:
-                    if item.get('path') and os.path.exists(item['path']):
-                        if item['path'] not in image_paths:
-                            image_paths.append(item['path'])
+            # Screenshot files were listed once while preparing inputs
+            image_paths = inputs.get('screenshot_files', [])
             
             quality_results = self.agents['quality'].check_quality(
                 generation_results.get('candidates', []),
@@ -155,7 +179,7 @@ class ContentPipelineController:
                 output_base,
                 media
             )
-            results['stages']['quality_control'] = quality_results
+            self._record_stage(results, results_stream, 'quality_control', quality_results)
             
             # Stage 6: Finalization
             logger.info("Stage 6: Running finalization")
@@ -166,7 +190,7 @@ class ContentPipelineController:
                 quality_results,
                 output_base
             )
-            results['stages']['finalization'] = finalization_results
+            self._record_stage(results, results_stream, 'finalization', finalization_results)
             
             # Update overall status
             results['status'] = 'completed'
@@ -182,6 +206,8 @@ class ContentPipelineController:
             logger.error(f"Pipeline failed: {e}")
             results['status'] = 'failed'
             results['error'] = str(e)
+        finally:
+            results_stream.close()
         
         return results
     
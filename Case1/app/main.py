@@ -1,7 +1,12 @@
 """FastAPI application for content generation pipeline."""
 
 import os
+import sys
+import queue
+import atexit
+import asyncio
 import logging
+from logging.handlers import QueueHandler, QueueListener
 from typing import Optional
 from fastapi import FastAPI, Form, HTTPException, UploadFile, File
 from fastapi.responses import JSONResponse
@@ -14,11 +19,18 @@ from app.controller import ContentPipelineController
 # Load environment variables
 load_dotenv()
 
-# Configure logging
+# Configure logging; records are formatted by the QueueHandler and written
+# to stderr by a listener thread, so request threads never block on I/O
+log_queue = queue.SimpleQueue()
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[QueueHandler(log_queue)],
+    force=True
 )
+log_listener = QueueListener(log_queue, logging.StreamHandler(sys.stderr))
+log_listener.start()
+atexit.register(log_listener.stop)
 logger = logging.getLogger(__name__)
 
 # Initialize FastAPI app
@@ -102,8 +114,9 @@ async def run_pipeline(
             kwargs['aso_file'] = aso_file
             kwargs['game_file'] = game_file
         
-        # Run the pipeline
-        results = controller.run_pipeline(mode=mode, **kwargs)
+        # Run the pipeline in a worker thread so the event loop keeps
+        # serving /health and other requests while it runs
+        results = await asyncio.to_thread(controller.run_pipeline, mode=mode, **kwargs)
         
         # Check if pipeline completed successfully
         if results['status'] == 'completed':
@@ -185,11 +198,14 @@ async def internal_error_handler(request, exc):
 
 
 if __name__ == "__main__":
-    # Run the application
+    # Run the application; WEB_CONCURRENCY > 1 starts that many workers,
+    # otherwise a single auto-reloading development server
+    workers = int(os.getenv('WEB_CONCURRENCY', '1'))
     uvicorn.run(
         "app.main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
+        reload=workers == 1,
+        workers=workers,
         log_level="info"
     )
\ No newline at end of file
@@ -2,18 +2,220 @@
 
 import os
 import json
+import hashlib
 import logging
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional
-from pydrive2.auth import GoogleAuth
-from pydrive2.drive import GoogleDrive
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseDownload
+from typing import Dict, List, Optional, Tuple
 import io
 
 logger = logging.getLogger(__name__)
 
+# Drive MIME type of folders
+_FOLDER_MIME = 'application/vnd.google-apps.folder'
+
+# Concurrent downloads, well under Drive's per-user request quota
+_MAX_DOWNLOAD_WORKERS = 8
+
+# Socket timeout (seconds) for Drive HTTP connections; the default never times out
+_HTTP_TIMEOUT = 60
+
+# Retries (with exponential backoff) on 429/403 rate-limit and 5xx responses
+_DOWNLOAD_RETRIES = 5
+
+# Metadata requested for listed files; md5Checksum/size let unchanged files skip download
+_FILE_FIELDS = "id, name, mimeType, size, md5Checksum, modifiedTime, parents"
+
+# Default on-disk listing cache; DRIVE_CACHE_PATH overrides, empty disables
+_DRIVE_CACHE_PATH = './cache/drive.sqlite'
+
+# Read size when hashing an existing local copy
+_HASH_CHUNK_BYTES = 1 << 20
+
+# Extensions collected when listing the prepared input directories
+_SCREENSHOT_EXTS = frozenset({'.jpg', '.jpeg', '.png', '.bmp', '.gif'})
+_VIDEO_EXTS = frozenset({'.mp4', '.avi', '.mov', '.mkv', '.webm'})
+
+
+def _list_media_files(directory: str, extensions: frozenset) -> List[str]:
+    """List files in directory with a suffix in extensions, in one scandir pass."""
+    try:
+        with os.scandir(directory) as it:
+            # Lower-case only the suffix rather than the whole file name
+            return [
+                entry.path for entry in it
+                if entry.name[entry.name.rfind('.'):].lower() in extensions and entry.is_file()
+            ]
+    except OSError:
+        return []
+
+
+def _is_up_to_date(local_path: str, metadata: Optional[Dict]) -> bool:
+    """Whether local_path already holds the Drive file described by metadata."""
+    # Google Docs formats carry no size/md5Checksum and always re-download
+    if not metadata or 'size' not in metadata or 'md5Checksum' not in metadata:
+        return False
+    try:
+        if os.stat(local_path).st_size != int(metadata['size']):
+            return False
+        md5 = hashlib.md5()
+        with open(local_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(_HASH_CHUNK_BYTES), b''):
+                md5.update(chunk)
+    except OSError:
+        return False
+    return md5.hexdigest() == metadata['md5Checksum']
+
+
+def _add_media_files(inputs: Dict):
+    """Attach the screenshot and video file lists so later stages don't re-scan."""
+    inputs['screenshot_files'] = _list_media_files(inputs['screenshot_dir'], _SCREENSHOT_EXTS)
+    inputs['video_files'] = _list_media_files(inputs['gameplay_dir'], _VIDEO_EXTS)
+
+
+class DriveCache:
+    """
+    SQLite copy of Drive listing metadata, kept current with the changes feed.
+    
+    Folders are listed through the API once and recorded as listed; after
+    that their children are served from the cache, and each run only pulls
+    the changes made since the stored start page token.
+    """
+    
+    def __init__(self, cache_path: str):
+        """
+        Open (and create if needed) the cache database.
+        
+        Args:
+            cache_path: Path to the SQLite file
+        """
+        Path(os.path.dirname(cache_path) or '.').mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(cache_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                file_id TEXT PRIMARY KEY, parent_id TEXT, name TEXT, mime TEXT,
+                size INT, md5 TEXT, modified_time TEXT, cached_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS files_parent ON files (parent_id);
+            CREATE TABLE IF NOT EXISTS listed (parent_id TEXT PRIMARY KEY);
+            CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT);
+        """)
+        self.conn.commit()
+    
+    def start_page_token(self) -> Optional[str]:
+        """Changes-feed token the cache is current up to, if any."""
+        row = self.conn.execute("SELECT value FROM state WHERE key = 'start_page_token'").fetchone()
+        return row[0] if row else None
+    
+    def reset(self, start_page_token: str):
+        """Forget which folders are listed and track changes from start_page_token."""
+        with self.conn:
+            self.conn.execute("DELETE FROM listed")
+            self._set_token(start_page_token)
+    
+    def children(self, parent_ids: List[str]) -> Tuple[List[Dict], List[str]]:
+        """
+        Cached children of the given folders.
+        
+        Returns:
+            Tuple of (metadata of cached children, folder IDs never listed)
+        """
+        marks = ','.join('?' * len(parent_ids))
+        listed = {row[0] for row in self.conn.execute(
+            f"SELECT parent_id FROM listed WHERE parent_id IN ({marks})", parent_ids
+        )}
+        hits = [parent_id for parent_id in parent_ids if parent_id in listed]
+        if not hits:
+            return [], parent_ids
+        
+        rows = self.conn.execute(
+            "SELECT file_id, parent_id, name, mime, size, md5, modified_time FROM files "
+            f"WHERE parent_id IN ({','.join('?' * len(hits))})",
+            hits
+        ).fetchall()
+        return [self._to_metadata(row) for row in rows], [p for p in parent_ids if p not in listed]
+    
+    def store_children(self, parent_ids: List[str], items: List[Dict]):
+        """Replace the cached children of freshly listed folders."""
+        marks = ','.join('?' * len(parent_ids))
+        with self.conn:
+            self.conn.execute(f"DELETE FROM files WHERE parent_id IN ({marks})", parent_ids)
+            self._upsert(items)
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO listed (parent_id) VALUES (?)", [(p,) for p in parent_ids]
+            )
+    
+    def apply_changes(self, changes: List[Dict], new_start_page_token: str):
+        """
+        Apply a changes.list result and advance the stored token.
+        
+        The feed covers the whole Drive, so only files inside listed folders
+        are stored; anything else, including files moved out of a listed
+        folder, is dropped from the cache.
+        """
+        listed = {row[0] for row in self.conn.execute("SELECT parent_id FROM listed")}
+        removed = []
+        updated = []
+        for change in changes:
+            item = change.get('file', {})
+            parent_id = (item.get('parents') or [None])[0]
+            if change.get('removed') or item.get('trashed') or parent_id not in listed:
+                removed.append((change['fileId'],))
+            else:
+                updated.append(item)
+        
+        with self.conn:
+            self.conn.executemany("DELETE FROM files WHERE file_id = ?", removed)
+            self._upsert(updated)
+            self._set_token(new_start_page_token)
+    
+    def close(self):
+        self.conn.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def _set_token(self, token: str):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO state (key, value) VALUES ('start_page_token', ?)", (token,)
+        )
+    
+    def _upsert(self, items: List[Dict]):
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO files "
+            "(file_id, parent_id, name, mime, size, md5, modified_time, cached_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    item['id'], (item.get('parents') or [None])[0], item['name'],
+                    item['mimeType'], item.get('size'), item.get('md5Checksum'),
+                    item.get('modifiedTime'), now
+                )
+                for item in items
+            ]
+        )
+    
+    @staticmethod
+    def _to_metadata(row: Tuple) -> Dict:
+        """Turn a files row back into the shape files.list returns."""
+        file_id, parent_id, name, mime, size, md5, modified_time = row
+        metadata = {'id': file_id, 'name': name, 'mimeType': mime, 'parents': [parent_id]}
+        if size is not None:
+            metadata['size'] = str(size)
+        if md5 is not None:
+            metadata['md5Checksum'] = md5
+        if modified_time is not None:
+            metadata['modifiedTime'] = modified_time
+        return metadata
+
 
 class DriveManager:
     """Manage Google Drive operations with service account."""
@@ -29,10 +231,18 @@ class DriveManager:
         self.credentials_path = credentials_path
         self.folder_id = folder_id
         self.service = None
+        self._credentials = None
+        self._local = threading.local()
+        self._cache = None
         self._initialize_service()
+        self._init_cache()
     
     def _initialize_service(self):
         """Initialize Google Drive service with service account."""
+        # Google client libraries are imported here so local runs never load them
+        from google.oauth2 import service_account
+        from googleapiclient.discovery import build
+        
         try:
             # Load service account credentials
             creds = service_account.Credentials.from_service_account_file(
@@ -41,29 +251,152 @@ class DriveManager:
             )
             
             # Build service
-            self.service = build('drive', 'v3', credentials=creds)
+            self._credentials = creds
+            self.service = build('drive', 'v3', http=self._authorized_http())
+            self._local.service = self.service
             logger.info("Google Drive service initialized successfully")
             
         except Exception as e:
             logger.error(f"Failed to initialize Google Drive service: {e}")
             raise
     
-    def list_folder_contents(self) -> List[Dict]:
+    def _init_cache(self):
+        """Open the listing cache; listings go straight to the API if this fails."""
+        cache_path = os.getenv('DRIVE_CACHE_PATH', _DRIVE_CACHE_PATH)
+        if not cache_path:
+            return
+        
+        try:
+            self._cache = DriveCache(cache_path)
+            logger.info(f"Drive listing cache opened at {cache_path}")
+        except Exception as e:
+            logger.warning(f"Drive listing cache unavailable at {cache_path}: {e}")
+    
+    def _sync_cache(self):
+        """Bring the listing cache up to date with the Drive changes feed."""
+        if self._cache is None:
+            return
+        
+        try:
+            token = self._cache.start_page_token()
+            if token is None:
+                # Nothing tracked yet: start the feed now, folders get listed in full
+                self._cache.reset(self._start_page_token())
+                return
+            
+            changes = []
+            while True:
+                results = self.service.changes().list(
+                    pageToken=token,
+                    fields=f"nextPageToken, newStartPageToken, "
+                           f"changes(fileId, removed, file({_FILE_FIELDS}, trashed))",
+                    pageSize=1000,
+                    includeItemsFromAllDrives=True,
+                    supportsAllDrives=True
+                ).execute()
+                
+                changes.extend(results.get('changes', []))
+                if 'newStartPageToken' in results:
+                    self._cache.apply_changes(changes, results['newStartPageToken'])
+                    logger.info(f"Drive listing cache applied {len(changes)} changes")
+                    return
+                token = results['nextPageToken']
+                
+        except Exception as e:
+            logger.warning(f"Drive changes sync failed, re-listing folders: {e}")
+            try:
+                self._cache.reset(self._start_page_token())
+            except Exception as reset_error:
+                logger.warning(f"Drive listing cache disabled: {reset_error}")
+                self.close()
+    
+    def _start_page_token(self) -> str:
+        """Current position of the Drive changes feed."""
+        return self.service.changes().getStartPageToken(supportsAllDrives=True).execute()['startPageToken']
+    
+    def _authorized_http(self):
         """
-        List all files and folders in the specified folder.
+        Authorized HTTP client keeping one keep-alive connection per host.
+        
+        httplib2.Http reuses its TLS connection to www.googleapis.com for
+        every request it sends, so a service built on it pays the handshake
+        once rather than per listing page or download chunk.
+        """
+        import httplib2
+        import google_auth_httplib2
+        
+        return google_auth_httplib2.AuthorizedHttp(
+            self._credentials,
+            http=httplib2.Http(cache=None, timeout=_HTTP_TIMEOUT)
+        )
+    
+    def _thread_service(self):
+        """Drive service for the calling thread; its HTTP client is not thread-safe."""
+        service = getattr(self._local, 'service', None)
+        if service is None:
+            from googleapiclient.discovery import build
+            
+            service = build('drive', 'v3', http=self._authorized_http(), cache_discovery=False)
+            self._local.service = service
+        return service
+    
+    def _list_children(self, folder_ids: List[str]) -> List[Dict]:
+        """
+        List the items directly inside any of several folders.
+        
+        Folders already in the listing cache are served from it; the rest
+        are listed with one query and then cached.
         
+        Args:
+            folder_ids: Drive folder IDs whose children to list
+            
         Returns:
-            List of file/folder metadata dictionaries
+            List of file/folder metadata dictionaries, across all pages
         """
-        try:
-            query = f"'{self.folder_id}' in parents"
+        if self._cache is None:
+            return self._fetch_children(folder_ids)
+        
+        items, missing = self._cache.children(folder_ids)
+        if missing:
+            fetched = self._fetch_children(missing)
+            try:
+                self._cache.store_children(missing, fetched)
+            except Exception as e:
+                logger.warning(f"Drive listing cache write failed: {e}")
+            items.extend(fetched)
+        return items
+    
+    def _fetch_children(self, folder_ids: List[str]) -> List[Dict]:
+        """List the items directly inside any of several folders with one API query."""
+        query = ' or '.join(f"'{folder_id}' in parents" for folder_id in folder_ids)
+        items = []
+        page_token = None
+        
+        while True:
             results = self.service.files().list(
                 q=query,
-                fields="files(id, name, mimeType, size)",
-                pageSize=100
+                fields=f"nextPageToken, files({_FILE_FIELDS})",
+                pageSize=1000,
+                pageToken=page_token,
+                includeItemsFromAllDrives=True,
+                supportsAllDrives=True
             ).execute()
             
-            items = results.get('files', [])
+            items.extend(results.get('files', []))
+            page_token = results.get('nextPageToken')
+            if not page_token:
+                return items
+    
+    def list_folder_contents(self) -> List[Dict]:
+        """
+        List all files and folders in the specified folder.
+        
+        Returns:
+            List of file/folder metadata dictionaries
+        """
+        try:
+            self._sync_cache()
+            items = self._list_children([self.folder_id])
             logger.info(f"Found {len(items)} items in Drive folder")
             return items
             
@@ -71,30 +404,38 @@ class DriveManager:
             logger.error(f"Error listing folder contents: {e}")
             return []
     
-    def download_file(self, file_id: str, output_path: str) -> bool:
+    def download_file(self, file_id: str, output_path: str, metadata: Optional[Dict] = None) -> bool:
         """
         Download a file from Google Drive.
         
         Args:
             file_id: Google Drive file ID
             output_path: Local path to save the file
+            metadata: Listing metadata for the file; when its size and
+                md5Checksum match output_path the download is skipped
             
         Returns:
             True if successful, False otherwise
         """
+        from googleapiclient.http import MediaIoBaseDownload
+        
         try:
-            request = self.service.files().get_media(fileId=file_id)
+            if _is_up_to_date(output_path, metadata):
+                logger.info(f"Skipped download, {output_path} is up to date")
+                return True
             
-            Path(os.path.dirname(output_path)).mkdir(parents=True, exist_ok=True)
+            request = self._thread_service().files().get_media(fileId=file_id)
             
-            fh = io.FileIO(output_path, 'wb')
-            downloader = MediaIoBaseDownload(fh, request)
+            Path(os.path.dirname(output_path)).mkdir(parents=True, exist_ok=True)
             
-            done = False
-            while not done:
-                status, done = downloader.next_chunk()
-                if status:
-                    logger.debug(f"Download progress: {int(status.progress() * 100)}%")
+            with io.FileIO(output_path, 'wb') as fh:
+                downloader = MediaIoBaseDownload(fh, request)
+                
+                done = False
+                while not done:
+                    status, done = downloader.next_chunk(num_retries=_DOWNLOAD_RETRIES)
+                    if status:
+                        logger.debug(f"Download progress: {int(status.progress() * 100)}%")
             
             logger.info(f"Downloaded file to {output_path}")
             return True
@@ -122,30 +463,40 @@ class DriveManager:
         try:
             items = self.list_folder_contents()
             
+            # Subfolder ID -> (local folder, category), listed together below
+            subfolders = {}
+            # (file metadata, local path, category or None), downloaded concurrently
+            jobs = []
+            
             for item in items:
                 name = item['name']
                 file_id = item['id']
                 mime_type = item['mimeType']
                 
                 # Determine local path based on file type
-                if mime_type == 'application/vnd.google-apps.folder':
+                if mime_type == _FOLDER_MIME:
                     # Handle folders
                     if 'gameplay' in name.lower():
-                        folder_path = os.path.join(local_base_path, 'Gameplay')
-                        self._download_folder_files(file_id, folder_path, 'gameplay', downloaded)
+                        subfolders[file_id] = (os.path.join(local_base_path, 'Gameplay'), 'gameplay')
                     elif 'screenshot' in name.lower():
-                        folder_path = os.path.join(local_base_path, 'screenshot')
-                        self._download_folder_files(file_id, folder_path, 'screenshots', downloaded)
+                        subfolders[file_id] = (os.path.join(local_base_path, 'screenshot'), 'screenshots')
                 else:
                     # Handle individual files
                     local_path = os.path.join(local_base_path, name)
-                    if self.download_file(file_id, local_path):
-                        if name.endswith('.txt'):
-                            downloaded['text_files'].append(local_path)
-                        elif any(ext in name.lower() for ext in ['.mp4', '.avi', '.mov']):
-                            downloaded['gameplay'].append(local_path)
-                        elif any(ext in name.lower() for ext in ['.jpg', '.png', '.jpeg']):
-                            downloaded['screenshots'].append(local_path)
+                    suffix = Path(name).suffix.lower()
+                    category = None
+                    if name.endswith('.txt'):
+                        category = 'text_files'
+                    elif suffix in _VIDEO_EXTS:
+                        category = 'gameplay'
+                    elif suffix in _SCREENSHOT_EXTS:
+                        category = 'screenshots'
+                    jobs.append((item, local_path, category))
+            
+            if subfolders:
+                jobs.extend(self._list_folder_files(subfolders))
+            
+            self._download_files(jobs, downloaded)
             
             logger.info(f"Downloaded content summary: {len(downloaded['gameplay'])} videos, "
                        f"{len(downloaded['screenshots'])} images, {len(downloaded['text_files'])} text files")
@@ -154,29 +505,54 @@ class DriveManager:
         except Exception as e:
             logger.error(f"Error downloading folder contents: {e}")
             return downloaded
+        finally:
+            self.close()
     
-    def _download_folder_files(self, folder_id: str, local_folder: str, 
-                               category: str, downloaded: Dict):
-        """Download files from a subfolder."""
+    def close(self):
+        """Close the listing cache; later listings go straight to the API."""
+        if self._cache is not None:
+            self._cache.close()
+            self._cache = None
+    
+    def _list_folder_files(self, subfolders: Dict[str, Tuple[str, str]]) -> List[Tuple[Dict, str, str]]:
+        """List files in subfolders as download jobs, using a single query for all of them."""
+        jobs = []
         try:
-            query = f"'{folder_id}' in parents"
-            results = self.service.files().list(
-                q=query,
-                fields="files(id, name, mimeType)",
-                pageSize=100
-            ).execute()
+            for local_folder, _ in subfolders.values():
+                Path(local_folder).mkdir(parents=True, exist_ok=True)
             
-            items = results.get('files', [])
-            Path(local_folder).mkdir(parents=True, exist_ok=True)
+            items = self._list_children(list(subfolders))
             
             for item in items:
-                if item['mimeType'] != 'application/vnd.google-apps.folder':
-                    local_path = os.path.join(local_folder, item['name'])
-                    if self.download_file(item['id'], local_path):
-                        downloaded[category].append(local_path)
+                if item['mimeType'] == _FOLDER_MIME:
+                    continue
+                
+                parent = next((p for p in item.get('parents', []) if p in subfolders), None)
+                if parent is None:
+                    continue
+                
+                local_folder, category = subfolders[parent]
+                jobs.append((item, os.path.join(local_folder, item['name']), category))
                         
         except Exception as e:
-            logger.error(f"Error downloading folder files: {e}")
+            logger.error(f"Error listing folder files: {e}")
+        
+        return jobs
+    
+    def _download_files(self, jobs: List[Tuple[Dict, str, Optional[str]]], downloaded: Dict):
+        """Download jobs on a thread pool, recording successful files by category in order."""
+        # Same-named files in one Drive folder share a local path; keep only
+        # the last, as sequential downloads would, so no two threads write
+        # (or hash) the same file
+        jobs = list({job[1]: job for job in jobs}.values())
+        if not jobs:
+            return
+        
+        with ThreadPoolExecutor(max_workers=min(_MAX_DOWNLOAD_WORKERS, len(jobs))) as executor:
+            results = executor.map(lambda job: self.download_file(job[0]['id'], job[1], job[0]), jobs)
+            for (_, local_path, category), ok in zip(jobs, results):
+                if ok and category:
+                    downloaded[category].append(local_path)
 
 
 def prepare_inputs_from_drive(
@@ -225,6 +601,7 @@ def prepare_inputs_from_drive(
             if os.path.exists(default_game):
                 inputs['game_file'] = default_game
         
+        _add_media_files(inputs)
         logger.info(f"Prepared Drive inputs: {inputs}")
         return inputs
         
@@ -269,5 +646,6 @@ def prepare_local_inputs(
             else:
                 Path(path).touch(exist_ok=True)
     
+    _add_media_files(inputs)
     logger.info(f"Prepared local inputs: {inputs}")
     return inputs
\ No newline at end of file
@@ -1,16 +1,98 @@
 """Media processing utilities for video and image handling."""
 
 import os
-import subprocess
+import functools
+import shutil
+import threading
 import tempfile
 from pathlib import Path
 from typing import List, Optional, Tuple
-import ffmpeg
-from PIL import Image
+from PIL import Image, ImageOps
 import logging
 
+try:
+    import pyvips
+except (ImportError, OSError):
+    # OSError: the Python binding is installed but libvips itself is missing
+    pyvips = None
+
 logger = logging.getLogger(__name__)
 
+# Whisper model shared by every transcription, loaded on first use
+_whisper_model = None
+_whisper_lock = threading.Lock()
+
+
+def _get_whisper_model():
+    """Return the shared faster-whisper model, loading it once."""
+    global _whisper_model
+    with _whisper_lock:
+        if _whisper_model is None:
+            from faster_whisper import WhisperModel
+            
+            # Use small model for efficiency
+            _whisper_model = WhisperModel(
+                "small",
+                device="cpu",
+                compute_type="int8",
+                cpu_threads=os.cpu_count() or 0,
+                num_workers=1
+            )
+        return _whisper_model
+
+
+@functools.lru_cache(maxsize=128)
+def _probe_cached(video_path: str, mtime_ns: int, size: int) -> dict:
+    """ffmpeg.probe result for one version of a file; mtime_ns/size key rewrites."""
+    import ffmpeg
+    
+    return ffmpeg.probe(video_path)
+
+
+def _probe(video_path: str) -> dict:
+    """Probe video_path, reusing the ffprobe result while the file is unchanged."""
+    stat = os.stat(video_path)
+    return _probe_cached(video_path, stat.st_mtime_ns, stat.st_size)
+
+
+def _extract_frames_by_seek(
+    video_path: str,
+    output_dir: str,
+    interval_seconds: float,
+    max_frames: int
+) -> List[str]:
+    """Extract frames with one seeking ffmpeg run per timestamp."""
+    import ffmpeg
+    
+    # Get video duration
+    probe = _probe(video_path)
+    duration = float(probe['streams'][0]['duration'])
+    
+    frame_paths = []
+    frame_count = 0
+    
+    for timestamp in range(0, int(duration), int(interval_seconds)):
+        if frame_count >= max_frames:
+            break
+            
+        output_path = os.path.join(output_dir, f"frame_{frame_count:04d}.jpg")
+        
+        try:
+            (
+                ffmpeg
+                .input(video_path, ss=timestamp)
+                .output(output_path, vframes=1, loglevel='error')
+                .overwrite_output()
+                .run(capture_stdout=True, capture_stderr=True)
+            )
+            frame_paths.append(output_path)
+            frame_count += 1
+        except ffmpeg.Error as e:
+            logger.warning(f"Failed to extract frame at {timestamp}s: {e}")
+            continue
+    
+    return frame_paths
+
 
 def extract_frames_from_video(
     video_path: str, 
@@ -30,64 +112,44 @@ def extract_frames_from_video(
     Returns:
         List of paths to extracted frame images
     """
+    # Imported on first use so the API server starts without ffmpeg-python
+    import ffmpeg
+    
     try:
         Path(output_dir).mkdir(parents=True, exist_ok=True)
         
-        # Get video duration
-        probe = ffmpeg.probe(video_path)
-        duration = float(probe['streams'][0]['duration'])
-        
-        frame_paths = []
-        frame_count = 0
-        
-        for timestamp in range(0, int(duration), int(interval_seconds)):
-            if frame_count >= max_frames:
-                break
-                
-            output_path = os.path.join(output_dir, f"frame_{frame_count:04d}.jpg")
-            
-            try:
-                (
-                    ffmpeg
-                    .input(video_path, ss=timestamp)
-                    .output(output_path, vframes=1, loglevel='error')
-                    .overwrite_output()
-                    .run(capture_stdout=True, capture_stderr=True)
+        try:
+            # Sample one frame per interval in a single decode pass
+            (
+                ffmpeg
+                .input(video_path)
+                .filter('fps', fps=1 / interval_seconds)
+                .output(
+                    os.path.join(output_dir, "frame_%04d.jpg"),
+                    vframes=max_frames,
+                    start_number=0,
+                    loglevel='error'
                 )
-                frame_paths.append(output_path)
-                frame_count += 1
-            except ffmpeg.Error as e:
-                logger.warning(f"Failed to extract frame at {timestamp}s: {e}")
-                continue
+                .overwrite_output()
+                .run(capture_stdout=True, capture_stderr=True)
+            )
+            
+            # One directory listing instead of a stat per possible frame
+            with os.scandir(output_dir) as it:
+                frame_paths = sorted(
+                    entry.path for entry in it
+                    if entry.name.startswith('frame_') and entry.name.endswith('.jpg')
+                )[:max_frames]
+        except ffmpeg.Error as e:
+            logger.warning(f"Single-pass frame extraction failed, seeking per frame: {e}")
+            frame_paths = _extract_frames_by_seek(video_path, output_dir, interval_seconds, max_frames)
                 
         logger.info(f"Extracted {len(frame_paths)} frames from {video_path}")
         return frame_paths
         
     except Exception as e:
         logger.error(f"Error extracting frames from video: {e}")
-        # Fallback: try simple ffmpeg command
-        try:
-            output_pattern = os.path.join(output_dir, "frame_%04d.jpg")
-            cmd = [
-                'ffmpeg', '-i', video_path,
-                '-vf', f'fps=1/{interval_seconds}',
-                '-vframes', str(max_frames),
-                output_pattern,
-                '-y'
-            ]
-            subprocess.run(cmd, capture_output=True, text=True, check=True)
-            
-            # Collect generated frames
-            frame_paths = sorted([
-                os.path.join(output_dir, f) 
-                for f in os.listdir(output_dir) 
-                if f.startswith('frame_') and f.endswith('.jpg')
-            ])[:max_frames]
-            
-            return frame_paths
-        except Exception as fallback_error:
-            logger.error(f"Fallback frame extraction also failed: {fallback_error}")
-            return []
+        return []
 
 
 def extract_audio_transcript(video_path: str, language: str = "auto") -> str:
@@ -102,16 +164,14 @@ def extract_audio_transcript(video_path: str, language: str = "auto") -> str:
         Extracted transcript text
     """
     try:
-        from faster_whisper import WhisperModel
+        model = _get_whisper_model()
         
-        # Use small model for efficiency
-        model = WhisperModel("small", device="cpu", compute_type="int8")
-        
-        # Transcribe
+        # Transcribe greedily, skipping silent stretches
         segments, info = model.transcribe(
             video_path,
             language=None if language == "auto" else language,
-            beam_size=5
+            beam_size=1,
+            vad_filter=True
         )
         
         # Combine segments
@@ -126,10 +186,61 @@ def extract_audio_transcript(video_path: str, language: str = "auto") -> str:
         return "Transcript extraction failed - audio processing unavailable"
 
 
+def _resize_with_vips(image_path: str, output_path: str, target_size: Tuple[int, int]) -> str:
+    """Fit and pad an image into target_size with libvips, decoding it as a stream."""
+    header = pyvips.Image.new_from_file(image_path)
+    close_ratio = abs(header.width / header.height - target_size[0] / target_size[1]) < 0.01
+    
+    # thumbnail shrinks on load where the format allows; 'force' stretches
+    # near-matching ratios to exactly target_size like the Pillow path
+    img = pyvips.Image.thumbnail(
+        image_path, target_size[0],
+        height=target_size[1],
+        size='force' if close_ratio else 'both'
+    )
+    img = img.colourspace('srgb')
+    if img.hasalpha():
+        img = img.flatten(background=[255, 255, 255])
+    
+    # Pad to target_size on a white background
+    img = img.embed(
+        (target_size[0] - img.width) // 2,
+        (target_size[1] - img.height) // 2,
+        target_size[0], target_size[1],
+        extend='background',
+        background=[255, 255, 255]
+    )
+    
+    Path(os.path.dirname(output_path)).mkdir(parents=True, exist_ok=True)
+    img.jpegsave(output_path, Q=95, strip=True)
+    
+    logger.info(f"Processed image saved to {output_path}")
+    return output_path
+
+
+def _is_target_jpeg(
+    image_path: str,
+    target_size: Tuple[int, int],
+    image: Optional[Image.Image] = None
+) -> bool:
+    """Whether image_path is already an RGB JPEG of exactly target_size (header only)."""
+    try:
+        img = image if image is not None else Image.open(image_path)
+        try:
+            return img.format == 'JPEG' and img.mode == 'RGB' and img.size == tuple(target_size)
+        finally:
+            if image is None:
+                img.close()
+    except Exception:
+        return False
+
+
 def resize_image_to_instagram(
     image_path: str, 
     output_path: str,
-    target_size: Tuple[int, int] = (1080, 1350)
+    target_size: Tuple[int, int] = (1080, 1350),
+    resample: int = Image.Resampling.LANCZOS,
+    image: Optional[Image.Image] = None
 ) -> str:
     """
     Resize and pad image to Instagram story format (4:5 ratio).
@@ -138,21 +249,35 @@ def resize_image_to_instagram(
         image_path: Path to input image
         output_path: Path to save processed image
         target_size: Target dimensions (width, height)
+        resample: Pillow resampling filter used for the resize
+        image: Already opened image_path, reused instead of reopening the
+            file; left open for the caller to close
         
     Returns:
         Path to processed image
     """
+    if _is_target_jpeg(image_path, target_size, image):
+        # Nothing to change; re-encoding would only cost time and quality
+        Path(os.path.dirname(output_path)).mkdir(parents=True, exist_ok=True)
+        shutil.copy2(image_path, output_path)
+        logger.info(f"Image already in target format, copied to {output_path}")
+        return output_path
+    
+    if pyvips is not None:
+        # libvips' SIMD streaming resize; resample/image only apply to Pillow
+        try:
+            return _resize_with_vips(image_path, output_path, target_size)
+        except Exception as e:
+            logger.warning(f"libvips resize failed for {image_path}, using Pillow: {e}")
+    
     try:
-        img = Image.open(image_path)
+        img = image if image is not None else Image.open(image_path)
         
-        # Convert to RGB if necessary
-        if img.mode in ('RGBA', 'LA', 'P'):
-            background = Image.new('RGB', img.size, (255, 255, 255))
-            if img.mode == 'RGBA' or img.mode == 'LA':
-                background.paste(img, mask=img.split()[-1])
-            else:
-                background.paste(img)
-            img = background
+        # Convert to RGB if necessary; real alpha is kept for the composite below
+        if img.mode == 'P':
+            img = img.convert('RGBA' if 'transparency' in img.info else 'RGB')
+        elif img.mode not in ('RGB', 'RGBA', 'LA'):
+            img = img.convert('RGB')
         
         # Calculate aspect ratios
         img_ratio = img.width / img.height
@@ -160,31 +285,17 @@ def resize_image_to_instagram(
         
         if abs(img_ratio - target_ratio) < 0.01:
             # Already correct ratio, just resize
-            img = img.resize(target_size, Image.Resampling.LANCZOS)
+            img = img.resize(target_size, resample)
         else:
-            # Need to pad
-            if img_ratio > target_ratio:
-                # Image is wider, fit to width
-                new_width = target_size[0]
-                new_height = int(new_width / img_ratio)
-                img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                
-                # Add padding top and bottom
-                padding = (target_size[1] - new_height) // 2
-                result = Image.new('RGB', target_size, (255, 255, 255))
-                result.paste(img, (0, padding))
-                img = result
-            else:
-                # Image is taller, fit to height
-                new_height = target_size[1]
-                new_width = int(new_height * img_ratio)
-                img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                
-                # Add padding left and right
-                padding = (target_size[0] - new_width) // 2
-                result = Image.new('RGB', target_size, (255, 255, 255))
-                result.paste(img, (padding, 0))
-                img = result
+            # Fit inside target_size; the white padding is added below
+            img = ImageOps.contain(img, target_size, method=resample)
+        
+        if img.mode != 'RGB' or img.size != target_size:
+            # Flatten alpha and pad onto white in one paste of the resized image
+            canvas = Image.new('RGB', target_size, (255, 255, 255))
+            offset = ((target_size[0] - img.width) // 2, (target_size[1] - img.height) // 2)
+            canvas.paste(img, offset, mask=img.getchannel('A') if img.mode != 'RGB' else None)
+            img = canvas
         
         # Save processed image
         Path(os.path.dirname(output_path)).mkdir(parents=True, exist_ok=True)
@@ -205,10 +316,17 @@ def resize_image_to_instagram(
             return image_path
 
 
+def _parse_frame_rate(rate: str) -> float:
+    """Parse an ffprobe rate such as '30000/1001'; '0/0' gives 0."""
+    num, _, den = rate.partition('/')
+    den = float(den) if den else 1.0
+    return float(num) / den if den else 0.0
+
+
 def get_video_info(video_path: str) -> dict:
     """Get basic video information."""
     try:
-        probe = ffmpeg.probe(video_path)
+        probe = _probe(video_path)
         video_stream = next(
             (stream for stream in probe['streams'] if stream['codec_type'] == 'video'),
             None
@@ -219,7 +337,7 @@ def get_video_info(video_path: str) -> dict:
                 'duration': float(probe['format'].get('duration', 0)),
                 'width': int(video_stream.get('width', 0)),
                 'height': int(video_stream.get('height', 0)),
-                'fps': eval(video_stream.get('r_frame_rate', '0/1')),
+                'fps': _parse_frame_rate(video_stream.get('r_frame_rate', '0/1')),
                 'codec': video_stream.get('codec_name', 'unknown')
             }
     except Exception as e:
@@ -10,16 +10,12 @@ def create_test_image():
     """Create a simple test image for testing."""
     # Create a simple gradient image
     width, height = 800, 600
-    img_array = np.zeros((height, width, 3), dtype=np.uint8)
+    img_array = np.empty((height, width, 3), dtype=np.uint8)
     
-    # Create gradient
-    for y in range(height):
-        for x in range(width):
-            img_array[y, x] = [
-                int(255 * x / width),  # Red gradient
-                int(255 * y / height),  # Green gradient
-                128  # Fixed blue
-            ]
+    # Create gradient (broadcast across rows/columns instead of per pixel)
+    img_array[..., 0] = 255 * np.arange(width) // width  # Red gradient
+    img_array[..., 1] = (255 * np.arange(height) // height)[:, None]  # Green gradient
+    img_array[..., 2] = 128  # Fixed blue
     
     # Save image
     img = Image.fromarray(img_array)